@@ -1,22 +1,18 @@
 #!/usr/bin/env python3
 
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import sys
 from pathlib import Path
 
-# Set up paths
-base_path = Path("/Users/willhammond/Summer '25 Research/Data Analysis (ECE)/troubleshooting_analysis_system")
-data_path = base_path / "outputs" / "data_exports" / "processed_observation_data.csv"
-output_path = base_path / "Updated_Outputs" / "Phase 1"
+# Make the shared troubleshooting_analysis package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from troubleshooting_analysis.config import interactive, script_paths
+from troubleshooting_analysis.context import AnalysisContext
+from troubleshooting_analysis.registry import register_analysis
+from troubleshooting_analysis.render import HeatmapJob, render_jobs
 
-# Create output directory if it doesn't exist
-output_path.mkdir(parents=True, exist_ok=True)
-
-# Load data
-print("Loading processed observation data...")
-df = pd.read_csv(data_path)
+# Set up paths (data and output locations come from troubleshooting_analysis/config.py)
+data_path, output_path = script_paths("Phase 1")
 
 # Define action columns
 action_cols = [
@@ -27,116 +23,88 @@ action_cols = [
     'Modify circuit w/ no clear rationale', 'Other'
 ]
 
-# Get student data (excluding master scan)
-student_data = df[df['student_id'] != 'ECE_ScanMaster'].copy()
-total_students = len(student_data['student_id'].unique())
-
-print(f"Total students: {total_students}")
-
-# Create non-temporal co-occurrence matrix
-# For each action X, what % of students who used X also used action Y somewhere in their session?
-cooccurrence_matrix = np.zeros((len(action_cols), len(action_cols)))
-
-# Get student-level action usage (did they use this action at all?)
-student_action_usage = student_data.groupby('student_id')[action_cols].sum() > 0
-
-for i, action_x in enumerate(action_cols):
-    # Find all students who used action X
-    students_with_x = student_action_usage[student_action_usage[action_x] == True]
-    total_x_students = len(students_with_x)
-    
-    if total_x_students > 0:
-        for j, action_y in enumerate(action_cols):
-            # Count how many of those students also used action Y
-            students_with_both = len(students_with_x[students_with_x[action_y] == True])
-            # Calculate percentage
-            cooccurrence_matrix[i, j] = (students_with_both / total_x_students) * 100
-    else:
-        # If action X never used, set all percentages to 0
-        cooccurrence_matrix[i, :] = 0
-
-# Create the visualization
-plt.style.use('seaborn-v0_8-white')
-plt.rcParams['font.family'] = 'Arial'
-plt.rcParams['font.size'] = 10
-
-# Create figure
-fig, ax = plt.subplots(figsize=(14, 12))
-
-# Create heatmap
-im = ax.imshow(cooccurrence_matrix, cmap='YlOrRd', aspect='auto', vmin=0, vmax=100)
-
-# Set ticks and labels
-ax.set_xticks(range(len(action_cols)))
-ax.set_yticks(range(len(action_cols)))
-
-# Create shorter labels for better readability
-short_labels = [
-    'Scope', 'Data sheet', 'Schematic', 'Visual inspect', 'Trace circuit',
-    'Reasoning', 'Calculations', 'Hypothesis', 'Modify (hyp)', 'Modify (no rationale)', 'Other'
-]
 
-ax.set_xticklabels(short_labels, rotation=45, ha='right', fontsize=9)
-ax.set_yticklabels(short_labels, fontsize=9)
+@register_analysis('Phase_1/Action_NonTemporal_Cooccurrence', output_dir='Phase 1')
+def run(ctx, output_path):
+    # Get student data (excluding master scan)
+    student_data = ctx.student_data
+    total_students = len(student_data['student_id'].unique())
+
+    print(f"Total students: {total_students}")
+
+    # Get student-level action usage (did they use this action at all?)
+    student_action_usage = ctx.behavior_usage[action_cols]
+
+    # Create non-temporal co-occurrence matrix
+    # For each action X, what % of students who used X also used action Y somewhere in their session?
+    # (pair counts of every behavior are computed once per run; this is the actions' layout of them)
+    cooccurrence_matrix = ctx.usage_cooccurrence.select(action_cols).percentages
+
+    # Create shorter labels for better readability
+    short_labels = [
+        'Scope', 'Data sheet', 'Schematic', 'Visual inspect', 'Trace circuit',
+        'Reasoning', 'Calculations', 'Hypothesis', 'Modify (hyp)', 'Modify (no rationale)', 'Other'
+    ]
+
+    # Describe the heatmap; it is rendered separately from the computation
+    heatmap = HeatmapJob(
+        matrix=cooccurrence_matrix,
+        output_file=output_path / 'actions_vs_actions_nontemporal_cooccurrence.png',
+        xlabels=short_labels,
+        ylabels=short_labels,
+        title=('Actions vs Actions Co-occurrence Matrix (Non-Temporal)\n' +
+               'Row Action → Column Action: % of students who used Row Action that also used Column Action\n' +
+               f'Based on {total_students} students'),
+        xlabel='Action Y (co-occurring)',
+        ylabel='Action X (reference)',
+        figsize=(14, 12),
+    )
+
+    # Create summary text file
+    summary_text = f"""Non-temporal co-occurrence matrix showing when actions occur together across a student's entire session. 
+Each cell shows: "Of students who used Row Action anywhere, what percentage also used Column Action anywhere?"
 
-# Add percentage text to each cell
-for i in range(len(action_cols)):
-    for j in range(len(action_cols)):
-        text = ax.text(j, i, f'{cooccurrence_matrix[i, j]:.0f}%',
-                      ha="center", va="center", color="black" if cooccurrence_matrix[i, j] < 50 else "white",
-                      fontsize=8, fontweight='bold')
+Analysis based on {total_students} students. Diagonal shows 100% (students always co-occur with themselves)."""
 
-# Add colorbar
-cbar = plt.colorbar(im, ax=ax, shrink=0.6)
-cbar.set_label('Co-occurrence Percentage', rotation=270, labelpad=20, fontsize=12)
+    with open(output_path / 'actions_vs_actions_nontemporal_cooccurrence.txt', 'w') as f:
+        f.write(summary_text)
 
-# Set title and labels
-ax.set_title('Actions vs Actions Co-occurrence Matrix (Non-Temporal)\n' + 
-             'Row Action → Column Action: % of students who used Row Action that also used Column Action\n' +
-             f'Based on {total_students} students', 
-             fontsize=14, fontweight='bold', pad=20)
+    print(f"\nAnalysis complete! Files saved to: {output_path}")
+    print("- actions_vs_actions_nontemporal_cooccurrence.png")
+    print("- actions_vs_actions_nontemporal_cooccurrence.txt")
 
-ax.set_xlabel('Action Y (co-occurring)', fontsize=12, fontweight='bold')
-ax.set_ylabel('Action X (reference)', fontsize=12, fontweight='bold')
+    # Print some key insights
+    print("\nKey Insights:")
+    print("Actions with highest average co-occurrence with other actions:")
+    avg_cooccurrence = np.mean(cooccurrence_matrix, axis=1)
+    for i, action in enumerate(action_cols):
+        print(f"  {action}: {avg_cooccurrence[i]:.1f}%")
 
-plt.tight_layout()
-plt.savefig(output_path / 'actions_vs_actions_nontemporal_cooccurrence.png', dpi=300, bbox_inches='tight')
-plt.show()
+    print("\nMost common action pairs (non-temporal):")
+    # Find highest co-occurrence pairs (excluding diagonal)
+    max_pairs = []
+    for i in range(len(action_cols)):
+        for j in range(len(action_cols)):
+            if i != j and cooccurrence_matrix[i, j] > 60:  # Threshold for "high" co-occurrence
+                max_pairs.append((action_cols[i], action_cols[j], cooccurrence_matrix[i, j]))
 
-# Create summary text file
-summary_text = f"""Non-temporal co-occurrence matrix showing when actions occur together across a student's entire session. 
-Each cell shows: "Of students who used Row Action anywhere, what percentage also used Column Action anywhere?"
+    max_pairs.sort(key=lambda x: x[2], reverse=True)
+    for pair in max_pairs[:10]:  # Top 10 pairs
+        print(f"  {pair[0]} → {pair[1]}: {pair[2]:.1f}%")
 
-Analysis based on {total_students} students. Diagonal shows 100% (students always co-occur with themselves)."""
+    # Print action usage counts
+    print("\nAction usage by students:")
+    action_usage = student_action_usage.sum().sort_values(ascending=False)
+    for action in action_usage.index:
+        print(f"  {action}: {action_usage[action]} students ({action_usage[action]/total_students*100:.1f}%)")
+
+    return [heatmap]
+
+
+if __name__ == "__main__":
+    # Create output directory if it doesn't exist
+    output_path.mkdir(parents=True, exist_ok=True)
 
-with open(output_path / 'actions_vs_actions_nontemporal_cooccurrence.txt', 'w') as f:
-    f.write(summary_text)
-
-print(f"\nAnalysis complete! Files saved to: {output_path}")
-print("- actions_vs_actions_nontemporal_cooccurrence.png")
-print("- actions_vs_actions_nontemporal_cooccurrence.txt")
-
-# Print some key insights
-print("\nKey Insights:")
-print("Actions with highest average co-occurrence with other actions:")
-avg_cooccurrence = np.mean(cooccurrence_matrix, axis=1)
-for i, action in enumerate(action_cols):
-    print(f"  {action}: {avg_cooccurrence[i]:.1f}%")
-
-print("\nMost common action pairs (non-temporal):")
-# Find highest co-occurrence pairs (excluding diagonal)
-max_pairs = []
-for i in range(len(action_cols)):
-    for j in range(len(action_cols)):
-        if i != j and cooccurrence_matrix[i, j] > 60:  # Threshold for "high" co-occurrence
-            max_pairs.append((action_cols[i], action_cols[j], cooccurrence_matrix[i, j]))
-
-max_pairs.sort(key=lambda x: x[2], reverse=True)
-for pair in max_pairs[:10]:  # Top 10 pairs
-    print(f"  {pair[0]} → {pair[1]}: {pair[2]:.1f}%")
-
-# Print action usage counts
-print("\nAction usage by students:")
-action_usage = student_action_usage.sum().sort_values(ascending=False)
-for action in action_usage.index:
-    print(f"  {action}: {action_usage[action]} students ({action_usage[action]/total_students*100:.1f}%)")
\ No newline at end of file
+    # Load data
+    print("Loading processed observation data...")
+    render_jobs(run(AnalysisContext.load(data_path), output_path), show=interactive())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
+# Make the shared troubleshooting_analysis package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from troubleshooting_analysis.config import interactive, script_paths
+from troubleshooting_analysis.context import AnalysisContext
+from troubleshooting_analysis.difference_index import COMPONENTS, DIFFERENCE_BANDS, difference_index
+from troubleshooting_analysis.registry import register_analysis
+
+# Set up paths (data and output locations come from troubleshooting_analysis/config.py)
+data_path, output_path = script_paths("Phase 1")
+
+# Define action columns (strategies are left out: 47 of the 59 students used the
+# OLD sheet, which had no strategy columns)
+action_cols = [
+    'Using scope', 'Reference data sheet', 'Reading schematic',
+    'Visually inspecting circuit', 'Tracing schematic/ circuit',
+    'Reasoning through the circuit', 'Analytic calculations',
+    'Makes a hypothesis', 'Modify circuit using hypothesis',
+    'Modify circuit w/ no clear rationale', 'Other'
+]
+
+# Bar colors for the difference bands, in DIFFERENCE_BANDS order
+band_colors = ['#228B22', '#90EE90', '#87CEEB', '#FFA07A', '#CD5C5C']
+
+
+@register_analysis('Phase_1/Comprehensive_Difference_Index', output_dir='Phase 1')
+def run(ctx, output_path, show=False):
+    master_data = ctx.master_data
+    student_data = ctx.student_data
+    print(f"ECE_MasterScan has {len(master_data)} steps")
+
+    # Score every student against the master scan
+    scores = difference_index(student_data, master_data, action_cols)
+    total_students = len(scores)
+    print(f"Scored {total_students} students")
+
+    csv_path = output_path / 'comprehensive_difference_index.csv'
+    scores.to_csv(csv_path)
+
+    band_labels = [label for _, label in DIFFERENCE_BANDS]
+    band_counts = scores['band'].value_counts().reindex(band_labels, fill_value=0)
+    band_pcts = band_counts / total_students * 100
+    most_common = band_counts.idxmax()
+    mean_index = scores['index'].mean()
+
+    # Create the visualization
+    plt.style.use('seaborn-v0_8-white')
+    plt.rcParams['font.family'] = 'Arial'
+    plt.rcParams['font.size'] = 10
+
+    fig, ax = plt.subplots(figsize=(20, 11))
+
+    # Histogram in bins of 10 index points, colored by difference band
+    bin_edges = np.arange(0, 130, 10)
+    counts, _ = np.histogram(scores['index'], bins=bin_edges)
+    band_bounds = [bound for bound, _ in DIFFERENCE_BANDS]
+    colors = [band_colors[np.searchsorted(band_bounds, left, side='right')] for left in bin_edges[:-1]]
+    bars = ax.bar(bin_edges[:-1] + 5, counts, width=8, color=colors, alpha=0.9)
+
+    for bar, count in zip(bars, counts):
+        if count > 0:
+            ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height() + 0.2,
+                    f'{count / total_students * 100:.0f}%\n({count})',
+                    ha='center', va='bottom', fontsize=10, fontweight='bold')
+
+    # Expert baseline and band boundaries
+    ax.axvline(0, color='#228B22', linewidth=4, alpha=0.9)
+    for bound in band_bounds[:-1]:
+        ax.axvline(bound, color='gray', linestyle='--', alpha=0.6)
+
+    ax.set_xlim(-5, 125)
+    ax.set_xlabel('Comprehensive Difference Index', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Number of Students', fontsize=14, fontweight='bold')
+    fig.suptitle('Student-Expert Observation Difference Index', fontsize=16, fontweight='bold')
+    ax.set_title(f"Most common: {band_pcts[most_common]:.0f}% show {most_common.lower()} | "
+                 f"Expert baseline: Multi-dimensional analysis | "
+                 f"{band_pcts['Good accuracy']:.0f}% achieve good accuracy",
+                 fontsize=12, style='italic', pad=15)
+
+    patterns_text = (f"KEY PATTERNS:\n"
+                     f"• Most common: {most_common} ({band_pcts[most_common]:.0f}%)\n"
+                     f"• Expert level: {band_counts['Expert-like']} students ({band_pcts['Expert-like']:.0f}%)\n"
+                     f"• Good accuracy: {band_counts['Good accuracy']} students ({band_pcts['Good accuracy']:.0f}%)\n"
+                     f"• Mean difference: {mean_index:.0f}")
+    ax.text(0.02, 0.97, patterns_text, transform=ax.transAxes, fontsize=11, va='top',
+            bbox=dict(boxstyle='round,pad=0.5', facecolor='lightblue', alpha=0.8))
+
+    lower_bounds = [0] + band_bounds[:-1]
+    color_names = ['Dark Green', 'Light Green', 'Blue', 'Salmon', 'Red']
+    legend_text = 'Color coding:\n' + '\n'.join(
+        f"{name}: {label} ({low}-{high})" if np.isfinite(high) else f"{name}: {label} ({low}+)"
+        for name, label, low, high in zip(color_names, band_labels, lower_bounds, band_bounds))
+    ax.text(0.98, 0.97, legend_text, transform=ax.transAxes, fontsize=11, va='top', ha='right',
+            bbox=dict(boxstyle='round,pad=0.5', facecolor='lightgray', alpha=0.8))
+
+    ax.grid(axis='y', alpha=0.3)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+    plt.tight_layout()
+    png_path = output_path / 'comprehensive_difference_index.png'
+    plt.savefig(png_path, dpi=300, bbox_inches='tight')
+    if show:
+        plt.show()
+    else:
+        plt.close()
+
+    # Create summary text file
+    component_means = scores[COMPONENTS].mean()
+    band_lines = '\n'.join(f"- {label}: {band_counts[label]} students ({band_pcts[label]:.1f}%)"
+                           for label in band_labels)
+    summary_text = f"""This analysis scores every student's observation sheet against the expert baseline (ECE_MasterScan) with a comprehensive difference index (0 = identical to the master scan, 100 = completely different).
+The index averages four components: content accuracy (which actions were observed), temporal alignment (step-aligned edit distance to the master scan's {len(master_data)} steps), quantitative precision (how many actions were marked) and behavioral consistency (how often each action was marked across steps).
+
+Mean component differences (0-1): content {component_means['content']:.2f}, temporal {component_means['temporal']:.2f}, quantitative {component_means['quantitative']:.2f}, consistency {component_means['consistency']:.2f}.
+Mean difference index: {mean_index:.1f} across {total_students} students.
+
+{band_lines}"""
+
+    txt_path = output_path / 'comprehensive_difference_index.txt'
+    with open(txt_path, 'w') as f:
+        f.write(summary_text)
+
+    print(f"\nAnalysis complete! Files saved to: {output_path}")
+    print(f"- Scores: {csv_path}")
+    print(f"- Analysis: {txt_path}")
+    print(f"- Visualization: {png_path}")
+
+
+if __name__ == "__main__":
+    # Create output directory if it doesn't exist
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # Load data
+    print("Loading processed observation data...")
+    run(AnalysisContext.load(data_path), output_path, show=interactive())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
+# Make the shared troubleshooting_analysis package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from troubleshooting_analysis.config import interactive, script_paths
+from troubleshooting_analysis.context import AnalysisContext
+from troubleshooting_analysis.modeling import model_success
+from troubleshooting_analysis.outcomes import outcome_metrics, read_outcomes
+from troubleshooting_analysis.registry import register_analysis
+
+# Set up paths (data and output locations come from troubleshooting_analysis/config.py).
+# The outcome labels are a CSV with student_id and a Y/N `success` column, set
+# with `outcomes` in the config file or UVA_TS_OUTCOMES
+data_path, output_path = script_paths("Phase 2")
+
+# Actions compared in the figure, with their labels
+figure_actions = {
+    'Modify circuit using hypothesis': 'Test Hypothesis',
+    'Makes a hypothesis': 'Makes Hypothesis',
+    'Modify circuit w/ no clear rationale': 'Fix w/o Plan',
+    'Visually inspecting circuit': 'Visual Inspection',
+    'Using scope': 'Using Scope',
+    'Reading schematic': 'Reading Schematic',
+}
+
+
+@register_analysis('Phase_2/Action_Effectiveness_Finding_3', output_dir='Phase 2', inputs=('outcomes',))
+def run(ctx, output_path, show=False):
+    settings = ctx.settings
+    if settings.get('outcomes') is None:
+        print("No outcome labels configured (set `outcomes` in the config file or UVA_TS_OUTCOMES); skipping")
+        return
+    outcomes = read_outcomes(settings['outcomes'])
+
+    # Univariate: % of successful / unsuccessful troubleshooters using each action
+    prevalence = outcome_metrics(ctx.df, outcomes, 'success').prevalence.reindex(['Y', 'N'])
+    missing = prevalence.index[prevalence.isna().all(axis=1)]
+    if len(missing):
+        print(f"No labelled troubleshooters with success = {', '.join(missing)}; skipping the comparison")
+        return
+    usage = prevalence[list(figure_actions)].T
+    usage.columns = ['successful', 'unsuccessful']
+    usage['difference'] = usage['successful'] - usage['unsuccessful']
+
+    # Multivariate: every action's effect given the others, transitions, first/last
+    # actions and actions per step (penalized logistic regression, bootstrap CIs)
+    try:
+        result = model_success(ctx.df, outcomes, model='logistic', n_bootstrap=200, processes=ctx.processes)
+    except ValueError as error:
+        print(f"{error}; skipping the comparison")
+        return
+    print(f"Held-out AUC ({len(result.scores)}-fold CV): {result.auc:.2f} "
+          f"over {len(result.target)} troubleshooters and {result.features.shape[1]} features")
+
+    usage.to_csv(output_path / "action_effectiveness_usage.csv")
+    result.effects.to_csv(output_path / "action_effectiveness_model_effects.csv")
+    result.importance.to_csv(output_path / "action_effectiveness_model_importance.csv")
+    result.scores.to_csv(output_path / "action_effectiveness_model_scores.csv")
+
+    # Usage rates side by side, with the multivariate odds ratios underneath
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 12), gridspec_kw={'height_ratios': [3, 2]})
+    x = np.arange(len(figure_actions))
+    width = 0.35
+    for offset, column, label, color in [(-width / 2, 'successful', 'Successful Troubleshooters', '#27ae60'),
+                                         (width / 2, 'unsuccessful', 'Unsuccessful Troubleshooters', '#e74c3c')]:
+        bars = ax1.bar(x + offset, usage[column], width, label=label, color=color, alpha=0.8,
+                       edgecolor='black', linewidth=1.2)
+        for bar, value in zip(bars, usage[column]):
+            ax1.text(bar.get_x() + bar.get_width() / 2, value + 1, f"{value:.0f}%", ha='center', va='bottom',
+                     fontsize=10, fontweight='bold')
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(figure_actions.values())
+    ax1.set_ylabel('Percentage of Troubleshooters Using Action', fontsize=12, fontweight='bold')
+    ax1.set_ylim(0, 115)
+    ax1.set_title("Which Actions Lead to Success?\nAction usage rates: Successful vs Unsuccessful troubleshooters",
+                  fontsize=14, fontweight='bold', pad=20)
+    ax1.legend(loc='upper right')
+    best = usage['difference'].idxmax()
+    ax1.text(0.02, 0.15, f"MOST EFFECTIVE: {figure_actions[best]} (+{usage['difference'][best]:.0f}% success advantage)",
+             transform=ax1.transAxes, fontsize=11, fontweight='bold',
+             bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.8))
+
+    effects = result.effects.reindex([f'uses: {action}' for action in figure_actions])
+    ratio = effects['odds_ratio'].to_numpy()
+    errors = np.abs(np.vstack([effects['lower'], effects['upper']]) - ratio)
+    ax2.errorbar(x, ratio, yerr=errors, fmt='o', color='black', capsize=6, markersize=8)
+    ax2.axhline(1, color='gray', linestyle='--', linewidth=1)
+    ax2.set_xticks(x)
+    ax2.set_xticklabels(figure_actions.values())
+    ax2.set_ylabel('Odds ratio of success\n(per SD, 95% bootstrap CI)', fontsize=12, fontweight='bold')
+    ax2.set_title(f"Multivariate effect of using each action, adjusted for all other behavior features "
+                  f"(held-out AUC {result.auc:.2f})", fontsize=12, fontweight='bold')
+
+    for ax in (ax1, ax2):
+        ax.grid(axis='y', alpha=0.3)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    plt.tight_layout()
+    png_path = output_path / "action_effectiveness_finding_3.png"
+    plt.savefig(png_path, dpi=300, bbox_inches='tight')
+    if show:
+        plt.show()
+    plt.close()
+
+    print("\nStrongest multivariate predictors (held-out AUC drop when shuffled):")
+    for feature, row in result.effects.head(10).iterrows():
+        print(f"- {feature}: odds ratio {row['odds_ratio']:.2f}, "
+              f"importance {result.importance.loc[feature, 'mean']:.3f}")
+    print(f"\nAnalysis complete! Files saved to {output_path}")
+    print(f"- Visualization: {png_path}")
+
+
+if __name__ == "__main__":
+    # Create output directory if it doesn't exist
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # Load data
+    print("Loading processed observation data...")
+    run(AnalysisContext.load(data_path), output_path, show=interactive())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
+# Make the shared troubleshooting_analysis package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from troubleshooting_analysis.config import interactive, script_paths
+from troubleshooting_analysis.context import AnalysisContext
+from troubleshooting_analysis.outcomes import outcome_metrics, read_outcomes
+from troubleshooting_analysis.registry import register_analysis
+
+# Set up paths (data and output locations come from troubleshooting_analysis/config.py).
+# The outcome labels are a CSV with student_id and a Y/N `success` column (plus
+# e.g. `circuit`), set with `outcomes` / `outcome_strata` in the config file or
+# UVA_TS_OUTCOMES / UVA_TS_OUTCOME_STRATA=circuit,success
+data_path, output_path = script_paths("Phase 2")
+
+OUTCOME_NAMES = {'Y': 'Successful\nTroubleshooters', 'N': 'Unsuccessful\nTroubleshooters'}
+OUTCOME_COLORS = {'Y': '#27ae60', 'N': '#e74c3c'}
+
+
+def stratum_label(key):
+    """Bar label of one stratum: the success outcome spelled out, other strata as given"""
+    key = key if isinstance(key, tuple) else (key,)
+    return '\n'.join(OUTCOME_NAMES.get(value, str(value)) for value in key)
+
+
+@register_analysis('Phase_2/Success_Patterns_Finding_1', output_dir='Phase 2', inputs=('outcomes',),
+                   settings=('outcome_strata',))
+def run(ctx, output_path, show=False):
+    settings = ctx.settings
+    if settings.get('outcomes') is None:
+        print("No outcome labels configured (set `outcomes` in the config file or UVA_TS_OUTCOMES); skipping")
+        return
+    strata = settings.get('outcome_strata', ['success'])
+
+    metrics = outcome_metrics(ctx.df, read_outcomes(settings['outcomes']), strata)
+    summary = metrics.summary
+    n_labelled = int(summary['sessions'].sum())
+
+    print(f"Troubleshooters with outcome labels: {n_labelled}")
+    print(f"Sessions without a complete label: {len(metrics.unlabeled)}")
+    print(summary.round(2).to_string())
+
+    # Save the per-session metrics and the per-stratum tables
+    metrics.sessions.to_csv(output_path / "success_patterns_sessions.csv")
+    summary.to_csv(output_path / "success_patterns_summary.csv")
+    metrics.prevalence.to_csv(output_path / "success_patterns_action_prevalence.csv")
+    metrics.distribution().to_csv(output_path / "success_patterns_actions_per_step.csv")
+    metrics.distribution('steps').to_csv(output_path / "success_patterns_steps_per_session.csv")
+
+    # Success rate and actions per step, one bar per stratum (successful ones first)
+    ascending = [stratum != 'success' for stratum in strata]
+    summary = summary.sort_index(ascending=ascending if len(strata) > 1 else ascending[0])
+    labels = [stratum_label(key) for key in summary.index]
+    outcome = summary.index.get_level_values('success') if 'success' in strata else [None] * len(summary)
+    palette = plt.get_cmap('tab10')
+    colors = [OUTCOME_COLORS.get(value, palette(i)) for i, value in enumerate(outcome)]
+    x = np.arange(len(summary))
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
+
+    ax1.bar(x, summary['share'], color=colors, alpha=0.8, edgecolor='black', linewidth=1.2)
+    for i, (share, sessions) in enumerate(zip(summary['share'], summary['sessions'])):
+        ax1.text(i, share + 1, f"{share:.0f}%\n({sessions} students)", ha='center', va='bottom',
+                 fontsize=12, fontweight='bold')
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(labels)
+    ax1.set_ylabel('Percentage of Troubleshooters', fontsize=12, fontweight='bold')
+    ax1.set_ylim(0, max(summary['share'].max() * 1.2, 10))
+    ax1.set_title(f"Troubleshooting Success Rate\nLive peer troubleshooting sessions\n"
+                  f"({n_labelled} troubleshooters with clear Y/N data)", fontsize=12, fontweight='bold', pad=20)
+    ax1.text(0.5, 0.02, "*Success determination may vary between troubleshooters due to different stopping criteria",
+             transform=ax1.transAxes, ha='center', fontsize=9, style='italic',
+             bbox=dict(boxstyle='round', facecolor='lightyellow', alpha=0.8))
+
+    per_step = summary['behaviors_per_step']
+    ax2.bar(x, per_step, color=colors, alpha=0.8, edgecolor='black', linewidth=1.2)
+    for i, value in enumerate(per_step):
+        ax2.text(i, value + per_step.max() * 0.03, f"{value:.2f}", ha='center', va='bottom',
+                 fontsize=12, fontweight='bold')
+    ax2.set_xticks(x)
+    ax2.set_xticklabels(labels)
+    ax2.set_ylabel('Actions Per Step', fontsize=12, fontweight='bold')
+    ax2.set_ylim(0, per_step.max() * 1.2)
+    ax2.set_title("Action Efficiency Comparison\nHow many actions per troubleshooting step?",
+                  fontsize=12, fontweight='bold', pad=20)
+    if strata == ['success'] and {'Y', 'N'} <= set(summary.index):
+        success, failure = per_step['Y'], per_step['N']
+        verdict = 'MORE' if success < failure else 'LESS'
+        ax2.text(0.5, 0.15, f"Successful troubleshooters are {verdict} EFFICIENT ({success:.2f} vs {failure:.2f})",
+                 transform=ax2.transAxes, ha='center', fontsize=11, fontweight='bold',
+                 bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.8))
+
+    for ax in (ax1, ax2):
+        ax.grid(axis='y', alpha=0.3)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    plt.tight_layout()
+    png_path = output_path / "success_patterns_finding_1.png"
+    plt.savefig(png_path, dpi=300, bbox_inches='tight')
+    if show:
+        plt.show()
+    plt.close()
+
+    print(f"\nAnalysis complete! Files saved to {output_path}")
+    print(f"- Summary: {output_path / 'success_patterns_summary.csv'}")
+    print(f"- Visualization: {png_path}")
+
+
+if __name__ == "__main__":
+    # Create output directory if it doesn't exist
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # Load data
+    print("Loading processed observation data...")
+    run(AnalysisContext.load(data_path), output_path, show=interactive())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
+# Make the shared troubleshooting_analysis package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from troubleshooting_analysis.columns import ACTION_COLS
+from troubleshooting_analysis.config import interactive, script_paths
+from troubleshooting_analysis.context import AnalysisContext
+from troubleshooting_analysis.outcomes import read_outcomes
+from troubleshooting_analysis.registry import register_analysis
+from troubleshooting_analysis.sessions import SessionIndex
+from troubleshooting_analysis.store import load_observations, student_rows
+
+# Set up paths (data and output locations come from troubleshooting_analysis/config.py).
+# The sessions come from the Phase 2 live observation data (`phase2_data` /
+# UVA_TS_PHASE2_DATA, same columns as processed_observation_data.csv), not the
+# Phase 1 data. With outcome labels configured (`outcomes` / UVA_TS_OUTCOMES, a
+# CSV with student_id and a Y/N `success` column) the openings and closings are
+# also broken down by outcome
+data_path, output_path = script_paths("Phase 2")
+
+action_labels = {
+    'Using scope': 'Using Scope', 'Reference data sheet': 'Reference Data Sheet',
+    'Reading schematic': 'Reading Schematic', 'Visually inspecting circuit': 'Visual Inspection',
+    'Tracing schematic/ circuit': 'Tracing Circuit', 'Reasoning through the circuit': 'Reasoning',
+    'Analytic calculations': 'Calculations', 'Makes a hypothesis': 'Makes Hypothesis',
+    'Modify circuit using hypothesis': 'Test Hypothesis', 'Modify circuit w/ no clear rationale': 'Fix w/o Plan',
+    'Other': 'Other',
+}
+colors = ['#3498db', '#2ecc71', '#f39c12', '#e67e22', '#9b59b6']
+TOP_N = 5
+
+
+@register_analysis('Phase_2/Troubleshooting_Approaches_Finding_2', output_dir='Phase 2',
+                   inputs=('phase2_data', 'outcomes'))
+def run(ctx, output_path, show=False):
+    settings = ctx.settings
+    if settings.get('phase2_data') is None:
+        print("No Phase 2 observation data configured (set `phase2_data` in the config file or "
+              "UVA_TS_PHASE2_DATA); skipping")
+        return
+    sessions = SessionIndex.from_frame(student_rows(load_observations(settings['phase2_data'])))
+    print(f"Troubleshooting sessions: {len(sessions)}")
+
+    # % of troubleshooters whose first / last step includes each action
+    distributions = pd.DataFrame({
+        'first_step': sessions.opening_distribution(ACTION_COLS),
+        'last_step': sessions.closing_distribution(ACTION_COLS),
+    })
+
+    outcomes = read_outcomes(settings['outcomes']) if settings.get('outcomes') is not None else None
+    if outcomes is not None and 'success' not in outcomes:
+        print(f"{settings['outcomes']} has no `success` column; skipping the outcome breakdown")
+    elif outcomes is not None:
+        outcome = outcomes['success']
+        for label, name in [('Y', 'successful'), ('N', 'unsuccessful')]:
+            cohort = outcome.index[outcome == label]
+            distributions[f'first_step_{name}'] = sessions.opening_distribution(ACTION_COLS, cohort)
+            distributions[f'last_step_{name}'] = sessions.closing_distribution(ACTION_COLS, cohort)
+
+    csv_path = output_path / "troubleshooting_approaches_first_last.csv"
+    distributions.to_csv(csv_path)
+    profile_path = output_path / "troubleshooting_approaches_position_profile.csv"
+    sessions.position_profile(5, ACTION_COLS).to_csv(profile_path)
+
+    fig, axes = plt.subplots(1, 2, figsize=(16, 7))
+    panels = [('first_step', 'How Do Troubleshooters Typically START?\nMost common first actions'),
+              ('last_step', 'How Do Troubleshooters Typically END?\nMost common final actions')]
+    for ax, (column, title) in zip(axes, panels):
+        top = distributions[column].sort_values(ascending=False).head(TOP_N)
+        bars = ax.bar(range(len(top)), top, color=colors[:len(top)], alpha=0.8, edgecolor='black', linewidth=1.2)
+        for bar, value in zip(bars, top):
+            ax.text(bar.get_x() + bar.get_width() / 2, value + top.max() * 0.02, f"{value:.0f}%",
+                    ha='center', va='bottom', fontsize=11, fontweight='bold')
+        ax.set_xticks(range(len(top)))
+        ax.set_xticklabels([action_labels[action] for action in top.index])
+        ax.set_ylabel('Percentage of Troubleshooters', fontsize=12, fontweight='bold')
+        ax.set_ylim(0, max(top.max() * 1.2, 1))
+        ax.set_title(title, fontsize=12, fontweight='bold', pad=20)
+        ax.text(0.02, 0.15, f'MOST COMMON: "{action_labels[top.index[0]]}" ({top.iloc[0]:.0f}%)',
+                transform=ax.transAxes, fontsize=11, fontweight='bold',
+                bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.8))
+        ax.grid(axis='y', alpha=0.3)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    plt.tight_layout()
+    png_path = output_path / "troubleshooting_approaches_finding_2.png"
+    plt.savefig(png_path, dpi=300, bbox_inches='tight')
+    if show:
+        plt.show()
+    plt.close()
+
+    print(distributions.round(1).to_string())
+    print(f"\nAnalysis complete! Files saved to {output_path}")
+    print(f"- First/last actions: {csv_path}")
+    print(f"- Position profile: {profile_path}")
+    print(f"- Visualization: {png_path}")
+
+
+if __name__ == "__main__":
+    # Create output directory if it doesn't exist
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # Load data
+    print("Loading processed observation data...")
+    run(AnalysisContext.load(data_path), output_path, show=interactive())
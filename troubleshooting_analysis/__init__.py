@@ -0,0 +1 @@
+"""Shared computation code for the UVA ECE troubleshooting observation analyses."""
@@ -0,0 +1,224 @@
+"""Incremental co-occurrence, usage and transition counts.
+
+Every count behind the co-occurrence and transition matrices is a sum over
+student sessions, so `SessionCounts` keeps each session's contribution:
+- same-step pair counts (the diagonal is the number of steps with each behavior)
+- whether the student used each behavior at all
+- step N -> N+1 transition pair counts, plus the behaviors of each step that
+  continues to step N+1 and of the final step
+
+Adding a batch of sessions only counts the new rows and adds them to the
+running totals; removing or correcting a session subtracts its stored
+contribution. Percentages are derived from the totals on demand, for all
+students or for any subset of them (e.g. the NEW-sheet students). The counts
+are kept for every behavior in `columns` and saved as one .npz file.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .bitset import BehaviorBitset
+from .columns import BEHAVIOR_COLS
+from .cooccurrence import normalize_rows
+from .store import read_observation_csv
+from .transitions import sort_by_step
+
+# Per-session count arrays: name -> shape given the number of behaviors
+_FIELDS = {
+    'pairs': lambda k: (k, k),
+    'usage': lambda k: (k,),
+    'transitions': lambda k: (k, k),
+    'continuing': lambda k: (k,),
+    'last': lambda k: (k,),
+}
+
+
+def _session_counts(data, columns):
+    """Each session's count arrays for the rows in `data`, stacked by student"""
+    bits = sort_by_step(BehaviorBitset.from_frame(data, columns))
+    flags = bits.to_matrix().astype(np.int64)
+    codes = bits.student_codes
+    steps = bits.steps.astype(np.int64)
+    k = len(columns)
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.zeros(0, dtype=np.int64)
+    student_ids = bits.students[codes[starts]]
+    session_of_row = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(codes)]))
+
+    counts = {name: np.zeros((len(starts),) + shape(k), dtype=np.int64) for name, shape in _FIELDS.items()}
+    if not len(starts):
+        return student_ids, counts
+
+    # One row behavior at a time, over only the rows that have it (no rows x K x K temporary)
+    for i in range(k):
+        rows = np.flatnonzero(flags[:, i])
+        np.add.at(counts['pairs'][:, i], session_of_row[rows], flags[rows])
+    counts['usage'] = (np.add.reduceat(flags, starts) > 0).astype(np.int64)
+
+    same_student = codes[1:] == codes[:-1]
+    consecutive = same_student & (steps[1:] == steps[:-1] + 1)
+    current, following = flags[:-1][consecutive], flags[1:][consecutive]
+    pair_session = session_of_row[:-1][consecutive]
+    for i in range(k):
+        rows = np.flatnonzero(current[:, i])
+        np.add.at(counts['transitions'][:, i], pair_session[rows], following[rows])
+    np.add.at(counts['continuing'], pair_session, current)
+    is_last = np.r_[~same_student, True]
+    counts['last'][session_of_row[is_last]] = flags[is_last]
+    return student_ids, counts
+
+
+class SessionCounts:
+    """Per-session behavior counts with running totals over all sessions"""
+
+    def __init__(self, columns=BEHAVIOR_COLS):
+        self.columns = list(columns)
+        self.sessions = {}
+        k = len(self.columns)
+        self.totals = {name: np.zeros(shape(k), dtype=np.int64) for name, shape in _FIELDS.items()}
+        self._col_index = {col: i for i, col in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, data, columns=BEHAVIOR_COLS):
+        counts = cls(columns)
+        counts.add_sessions(data)
+        return counts
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, student_id):
+        return student_id in self.sessions
+
+    def add_sessions(self, data):
+        """Count the complete sessions in `data` and add them to the totals.
+
+        Raises ValueError if a session is already counted; use
+        `replace_sessions` to correct one.
+        """
+        student_ids, counts = _session_counts(data, self.columns)
+        existing = [student_id for student_id in student_ids if student_id in self.sessions]
+        if existing:
+            raise ValueError(f"Sessions already counted: {', '.join(map(str, existing))}")
+        for name, values in counts.items():
+            self.totals[name] += values.sum(axis=0)
+        for i, student_id in enumerate(student_ids):
+            self.sessions[student_id] = {name: values[i] for name, values in counts.items()}
+        return list(student_ids)
+
+    def remove_session(self, student_id):
+        """Subtract a session's counts from the totals and forget it"""
+        try:
+            session = self.sessions.pop(student_id)
+        except KeyError:
+            raise KeyError(f"No counted session for {student_id!r}") from None
+        for name, values in session.items():
+            self.totals[name] -= values
+
+    def replace_sessions(self, data):
+        """Recount the sessions in `data`, replacing any already counted"""
+        for student_id in pd.unique(data['student_id']):
+            if student_id in self.sessions:
+                self.remove_session(student_id)
+        return self.add_sessions(data)
+
+    def _summed(self, name, students):
+        if students is None:
+            return self.totals[name]
+        k = len(self.columns)
+        total = np.zeros(_FIELDS[name](k), dtype=np.int64)
+        for student_id in students:
+            total += self.sessions[student_id][name]
+        return total
+
+    def _indices(self, cols):
+        return [self._col_index[col] for col in cols]
+
+    def temporal_cooccurrence(self, row_cols, col_cols=None, students=None):
+        """Same-step conditional co-occurrence, as `conditional_cooccurrence` on step rows"""
+        col_cols = row_cols if col_cols is None else col_cols
+        rows, cols = self._indices(row_cols), self._indices(col_cols)
+        pairs = self._summed('pairs', students)
+        return normalize_rows(pairs[np.ix_(rows, cols)], pairs[rows, rows])
+
+    def student_usage(self, cols=None, students=None):
+        """Student x behavior table of whether each student ever used each behavior"""
+        cols = self.columns if cols is None else list(cols)
+        students = list(self.sessions) if students is None else list(students)
+        usage = np.array([self.sessions[student_id]['usage'] for student_id in students],
+                         dtype=bool).reshape(len(students), len(self.columns))
+        return pd.DataFrame(usage[:, self._indices(cols)], index=pd.Index(students, name='student_id'), columns=cols)
+
+    def nontemporal_cooccurrence(self, row_cols, col_cols=None, students=None):
+        """Conditional co-occurrence over students ("used X anywhere" -> "used Y anywhere")"""
+        col_cols = row_cols if col_cols is None else col_cols
+        usage = self.student_usage(students=students).to_numpy(dtype=np.int64)
+        rows, cols = self._indices(row_cols), self._indices(col_cols)
+        return normalize_rows(usage[:, rows].T @ usage[:, cols], usage[:, rows].sum(axis=0))
+
+    def next_step_transitions(self, cols, students=None):
+        """Step N -> N+1 counts, as `transitions.next_step_transitions`"""
+        idx = self._indices(cols)
+        transitions = self._summed('transitions', students)
+        return (transitions[np.ix_(idx, idx)],
+                self._summed('continuing', students)[idx],
+                self._summed('last', students)[idx])
+
+    def save(self, path):
+        """Write the per-session counts to `path` (.npz).
+
+        Integer or string student IDs come back from `load` as they were; IDs
+        of any other type (or a mix of types) are saved as strings.
+        """
+        student_ids = list(self.sessions)
+        k = len(self.columns)
+        arrays = {
+            name: np.array([self.sessions[student_id][name] for student_id in student_ids],
+                           dtype=np.int64).reshape((len(student_ids),) + shape(k))
+            for name, shape in _FIELDS.items()
+        }
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp.npz')
+        ids = np.array(student_ids)
+        if ids.dtype.kind not in 'iuU':
+            ids = ids.astype(str)
+        np.savez(tmp_path, columns=np.array(self.columns), student_ids=ids, **arrays)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        """Read counts written by `save`; the totals are re-summed from the sessions"""
+        with np.load(path) as stored:
+            counts = cls(stored['columns'].tolist())
+            for name in _FIELDS:
+                counts.totals[name] = stored[name].sum(axis=0)
+            arrays = {name: stored[name] for name in _FIELDS}
+            for i, student_id in enumerate(stored['student_ids'].tolist()):
+                counts.sessions[student_id] = {name: values[i] for name, values in arrays.items()}
+        return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the incremental session count store")
+    parser.add_argument('store', type=Path, help="Count store (.npz), created if missing")
+    parser.add_argument('--add', type=Path, nargs='*', default=[], help="Processed CSVs of new sessions")
+    parser.add_argument('--replace', type=Path, nargs='*', default=[], help="Processed CSVs of corrected sessions")
+    parser.add_argument('--remove', nargs='*', default=[], help="Student IDs of sessions to delete")
+    args = parser.parse_args(argv)
+
+    counts = SessionCounts.load(args.store) if args.store.exists() else SessionCounts()
+    for student_id in args.remove:
+        counts.remove_session(student_id)
+    for csv_path in args.replace:
+        counts.replace_sessions(read_observation_csv(csv_path))
+    for csv_path in args.add:
+        counts.add_sessions(read_observation_csv(csv_path))
+    counts.save(args.store)
+    print(f"{args.store}: {len(counts)} sessions")
+
+
+if __name__ == '__main__':
+    main()
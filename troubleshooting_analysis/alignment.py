@@ -0,0 +1,189 @@
+"""Step alignment of student sessions against a reference (master scan) session.
+
+Each session is a sequence of per-step behavior bitmasks. Two sequences are
+aligned Needleman-Wunsch style: pairing a student step with a reference step
+costs the Jaccard distance of their masks, and leaving a step of either
+sequence unpaired costs `gap_cost`. All students are aligned in one call: the
+sessions are padded into a (students x steps) mask array and the dynamic
+programming table is filled one anti-diagonal at a time, every cell of the
+anti-diagonal for every student at once. The traceback is vectorized across
+students the same way.
+
+Each aligned pair splits into the behaviors the student matched, the reference
+behaviors they missed and the extra behaviors they marked, per reference step.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .bitset import BehaviorBitset, popcount
+from .transitions import sort_by_step
+from .tracing import traced
+
+# Traceback moves
+_PAIR, _EXTRA_STEP, _MISSED_STEP = 0, 1, 2
+
+
+def padded_sequences(bits):
+    """Each student's step masks in step order, padded into one array.
+
+    Returns the student IDs, a (students x longest session) uint32 array of
+    masks (0 past the end of a session), the matching step numbers (-1 past
+    the end) and the number of steps per student.
+    """
+    bits = sort_by_step(bits)
+    codes = bits.student_codes
+    present, first = np.unique(codes, return_index=True)
+    lengths = np.diff(np.r_[first, len(codes)])
+    rows = np.repeat(np.arange(len(present)), lengths)
+    positions = np.arange(len(codes)) - np.repeat(first, lengths)
+
+    width = lengths.max(initial=0)
+    sequences = np.zeros((len(present), width), dtype=np.uint32)
+    sequences[rows, positions] = bits.masks
+    steps = np.full((len(present), width), -1, dtype=np.int64)
+    steps[rows, positions] = bits.steps
+    return bits.students[present], sequences, steps, lengths
+
+
+def mask_distance(a, b):
+    """Jaccard distance between bitmasks (0 when both are empty); broadcasts"""
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.uint32), np.asarray(b, dtype=np.uint32))
+    union = popcount((a | b).ravel()).reshape(a.shape)
+    differing = popcount((a ^ b).ravel()).reshape(a.shape)
+    return np.divide(differing, union, out=np.zeros(a.shape), where=union > 0)
+
+
+def _fill_table(costs, lengths, gap_cost):
+    """Alignment cost table and traceback moves, filled by anti-diagonals.
+
+    `costs` is the (students x student steps x reference steps) pairing cost.
+    Cells past the end of a student's session are filled too but never read.
+    """
+    n_students, n_rows, n_cols = costs.shape
+    table = np.zeros((n_students, n_rows + 1, n_cols + 1))
+    moves = np.zeros((n_students, n_rows + 1, n_cols + 1), dtype=np.int8)
+    table[:, :, 0] = np.arange(n_rows + 1) * gap_cost
+    table[:, 0, :] = np.arange(n_cols + 1) * gap_cost
+    moves[:, 1:, 0] = _EXTRA_STEP
+    moves[:, 0, 1:] = _MISSED_STEP
+
+    for diagonal in range(2, n_rows + n_cols + 1):
+        i = np.arange(max(1, diagonal - n_cols), min(n_rows, diagonal - 1) + 1)
+        j = diagonal - i
+        candidates = np.stack([
+            table[:, i - 1, j - 1] + costs[:, i - 1, j - 1],
+            table[:, i - 1, j] + gap_cost,
+            table[:, i, j - 1] + gap_cost,
+        ])
+        best = candidates.argmin(axis=0)
+        table[:, i, j] = np.take_along_axis(candidates, best[None], axis=0)[0]
+        moves[:, i, j] = best
+    return table, moves
+
+
+def _trace_back(moves, lengths, n_cols):
+    """Aligned (student, student position, reference position) triples.
+
+    Positions are 0-based, -1 marks a gap. Triples come out grouped by path
+    length from the end; callers sort them.
+    """
+    students = np.arange(len(lengths))
+    i = lengths.astype(np.int64)
+    j = np.full(len(lengths), n_cols, dtype=np.int64)
+    pieces = []
+    active = (i > 0) | (j > 0)
+    while active.any():
+        s, si, sj = students[active], i[active], j[active]
+        move = moves[s, si, sj]
+        pieces.append((s,
+                       np.where(move == _MISSED_STEP, -1, si - 1),
+                       np.where(move == _EXTRA_STEP, -1, sj - 1)))
+        i[active] = si - (move != _MISSED_STEP)
+        j[active] = sj - (move != _EXTRA_STEP)
+        active = (i > 0) | (j > 0)
+    if not pieces:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    return tuple(np.concatenate(parts) for parts in zip(*pieces))
+
+
+@dataclass
+class BatchAlignment:
+    """Every student's session aligned against one reference session
+
+    `pairs` has one row per aligned position: `student_step` / `master_step`
+    (-1 for a gap), the pairing cost and the matched, missed and extra
+    behavior bitmasks. `distance` is each student's total alignment cost.
+    """
+    student_ids: np.ndarray
+    distance: np.ndarray
+    lengths: np.ndarray
+    reference_steps: np.ndarray
+    pairs: pd.DataFrame
+    columns: list
+
+    def _unpack(self, masks):
+        shifts = np.arange(len(self.columns), dtype=np.uint32)
+        return ((masks.to_numpy(dtype=np.uint32)[:, None] >> shifts) & 1).astype(np.int64)
+
+    def step_counts(self, kind):
+        """(reference step x behavior) number of students with each `kind`
+        ('matched', 'missed' or 'extra') behavior at that reference step.
+
+        Extra behaviors of student steps that were left unpaired are counted
+        in a final 'unaligned' row.
+        """
+        flags = self._unpack(self.pairs[kind])
+        labels = list(self.reference_steps) + ['unaligned']
+        positions = self.pairs['master_position'].to_numpy()
+        groups = np.where(positions >= 0, positions, len(self.reference_steps))
+        counts = np.zeros((len(labels), len(self.columns)), dtype=np.int64)
+        np.add.at(counts, groups, flags)
+        return pd.DataFrame(counts, index=pd.Index(labels, name='master_step'), columns=self.columns)
+
+    def student_counts(self):
+        """Per-student totals of matched, missed and extra behavior marks"""
+        totals = pd.DataFrame({
+            kind: popcount(self.pairs[kind].to_numpy(dtype=np.uint32)) for kind in ('matched', 'missed', 'extra')
+        })
+        totals['student_id'] = self.pairs['student_id'].to_numpy()
+        return totals.groupby('student_id', sort=False).sum().reindex(self.student_ids, fill_value=0)
+
+
+@traced()
+def align_to_reference(student_data, reference_data, columns, gap_cost=1.0):
+    """Align every student's session in `student_data` against the single
+    session in `reference_data` (e.g. the master scan)"""
+    columns = list(columns)
+    student_ids, sequences, steps, lengths = padded_sequences(BehaviorBitset.from_frame(student_data, columns))
+    _, reference, reference_steps, reference_length = padded_sequences(
+        BehaviorBitset.from_frame(reference_data, columns))
+    if len(reference_length) != 1:
+        raise ValueError(f"Expected one reference session, got {len(reference_length)}")
+    reference, reference_steps = reference[0], reference_steps[0]
+
+    costs = mask_distance(sequences[:, :, None], reference[None, None, :])
+    table, moves = _fill_table(costs, lengths, gap_cost)
+    distance = table[np.arange(len(lengths)), lengths, len(reference)]
+
+    student, i, j = _trace_back(moves, lengths, len(reference))
+    order = np.lexsort((-np.arange(len(student)), student))
+    student, i, j = student[order], i[order], j[order]
+
+    student_masks = np.where(i >= 0, sequences[student, i], 0).astype(np.uint32)
+    reference_masks = np.where(j >= 0, reference[j], 0).astype(np.uint32)
+    paired = (i >= 0) & (j >= 0)
+    pairs = pd.DataFrame({
+        'student_id': student_ids[student],
+        'student_step': np.where(i >= 0, steps[student, i], -1),
+        'master_step': np.where(j >= 0, reference_steps[j], -1),
+        'master_position': j,
+        'cost': np.where(paired, mask_distance(student_masks, reference_masks), gap_cost),
+        'matched': student_masks & reference_masks,
+        'missed': reference_masks & ~student_masks,
+        'extra': student_masks & ~reference_masks,
+    })
+    return BatchAlignment(student_ids, distance, lengths, reference_steps, pairs, columns)
@@ -0,0 +1,196 @@
+"""Benchmarks of the hot paths on synthetic data at increasing scale.
+
+For each row count a synthetic CSV is written (see `synthetic.py`) and every
+stage is timed: the CSV parse, the Parquet cache build and reload, the
+temporal and non-temporal co-occurrence matrices, the over/under comparison,
+the step transitions and one heatmap render. Each stage reports the best wall
+time over `--repeat` runs, its throughput in rows/s and the peak memory it
+allocated (tracemalloc, measured in a separate run so the tracing overhead
+doesn't skew the times).
+
+Results are written as JSON; `--compare` checks them against an earlier
+results file and flags stages that got slower by more than `--threshold`.
+`--smoke` also runs every registered analysis end to end on a synthetic table
+of the smallest size, so data that the generator can produce but the
+analyses cannot handle fails the benchmark:
+
+    python -m troubleshooting_analysis.benchmark --rows 1e3 1e5 1e7 --out bench.json
+    python -m troubleshooting_analysis.benchmark --rows 1e3 1e5 --compare bench.json
+    python -m troubleshooting_analysis.benchmark --rows 300 --repeat 1 --smoke
+"""
+
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from .columns import ACTION_COLS, BEHAVIOR_COLS, STRATEGY_COLS
+from .comparison import compare_to_scans, scan_usage
+from .cooccurrence import conditional_cooccurrence, student_usage
+from .render import HeatmapJob, render_heatmap
+from .store import load_observations, read_observation_csv, student_rows
+from .synthetic import rows_to_students, write_observations_csv
+from .transitions import lag_transitions, next_step_transitions
+
+DEFAULT_ROWS = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+
+def _measure(func, repeat):
+    """Best wall time over `repeat` runs and the peak traced allocation of one more"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def _stages(csv_path, work_dir):
+    """name -> zero-argument callable, in run order"""
+    df = read_observation_csv(csv_path)
+    students = student_rows(df)
+    usage = student_usage(students, BEHAVIOR_COLS)
+    scans = scan_usage(df)
+    cache_dir = Path(work_dir) / 'parquet'
+    load_observations(csv_path, cache_dir=cache_dir)  # build once so the reload stage hits the cache
+
+    heatmap = HeatmapJob(
+        matrix=conditional_cooccurrence(students, BEHAVIOR_COLS),
+        output_file=Path(work_dir) / 'heatmap.png',
+        xlabels=BEHAVIOR_COLS, ylabels=BEHAVIOR_COLS,
+        title='Benchmark heatmap', xlabel='Behavior Y', ylabel='Behavior X',
+    )
+
+    def cache_build():
+        for path in cache_dir.glob('*.parquet'):
+            path.unlink()
+        load_observations(csv_path, cache_dir=cache_dir)
+
+    return {
+        'load_csv': lambda: read_observation_csv(csv_path),
+        'load_cache_build': cache_build,
+        'load_cache': lambda: load_observations(csv_path, cache_dir=cache_dir),
+        'student_rows': lambda: student_rows(df),
+        'temporal_cooccurrence': lambda: conditional_cooccurrence(students, BEHAVIOR_COLS),
+        'strategies_vs_actions': lambda: conditional_cooccurrence(students, STRATEGY_COLS, ACTION_COLS),
+        'student_usage': lambda: student_usage(students, BEHAVIOR_COLS),
+        'nontemporal_cooccurrence': lambda: conditional_cooccurrence(usage, BEHAVIOR_COLS),
+        'over_under': lambda: compare_to_scans(usage, scans),
+        'next_step_transitions': lambda: next_step_transitions(students, STRATEGY_COLS),
+        'lag_transitions': lambda: lag_transitions(students, BEHAVIOR_COLS, max_lag=3),
+        'render_heatmap': lambda: render_heatmap(heatmap),
+    }, len(df)
+
+
+def run_benchmarks(row_counts, repeat=3, stages=None, seed=0):
+    """Time every stage at each row count; returns a list of result records"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+    results = []
+    for target_rows in row_counts:
+        with tempfile.TemporaryDirectory() as work_dir:
+            csv_path = Path(work_dir) / 'processed_observation_data.csv'
+            write_observations_csv(csv_path, rows_to_students(target_rows), seed=seed)
+            stage_funcs, n_rows = _stages(csv_path, work_dir)
+            for name, func in stage_funcs.items():
+                if stages and name not in stages:
+                    continue
+                seconds, peak = _measure(func, repeat)
+                record = {
+                    'stage': name,
+                    'rows': n_rows,
+                    'seconds': seconds,
+                    'rows_per_second': n_rows / seconds if seconds > 0 else float('inf'),
+                    'peak_bytes': peak,
+                }
+                results.append(record)
+                print(f"{n_rows:>10} rows  {name:<26} {seconds * 1000:10.2f} ms  "
+                      f"{record['rows_per_second']:14,.0f} rows/s  {peak / 1024 ** 2:9.1f} MB peak")
+    return results
+
+
+def run_all_analyses(n_rows, seed=0):
+    """Run every registered analysis once on a synthetic table of about
+    `n_rows` rows (no outcome labels); returns {name: seconds}"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from .context import AnalysisContext
+    from .registry import discover_analyses
+    from .runner import run_analyses
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_path = Path(work_dir) / 'processed_observation_data.csv'
+        write_observations_csv(csv_path, rows_to_students(n_rows), seed=seed)
+        discover_analyses()
+        ctx = AnalysisContext.load(csv_path, settings={}, cache_dir=Path(work_dir) / 'parquet')
+        return run_analyses(ctx, Path(work_dir) / 'outputs', processes=1)
+
+
+def compare_results(results, baseline, threshold=0.2):
+    """Stages at least `threshold` (fractional) slower than in `baseline`"""
+    previous = {(record['stage'], record['rows']): record for record in baseline}
+    regressions = []
+    for record in results:
+        before = previous.get((record['stage'], record['rows']))
+        if before is None or before['seconds'] <= 0:
+            continue
+        ratio = record['seconds'] / before['seconds']
+        if ratio > 1 + threshold:
+            regressions.append({**record, 'baseline_seconds': before['seconds'], 'ratio': ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analysis hot paths on synthetic data")
+    parser.add_argument('--rows', type=float, nargs='+', default=DEFAULT_ROWS,
+                        help="Approximate row counts to benchmark (e.g. 1e3 1e5 1e7)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage (best is kept)")
+    parser.add_argument('--stages', nargs='*', default=None, help="Only run these stages")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', type=Path, default=None, help="Write the results JSON here")
+    parser.add_argument('--compare', type=Path, default=None, help="Earlier results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Slowdown fraction reported as a regression")
+    parser.add_argument('--smoke', action='store_true',
+                        help="Also run every registered analysis on synthetic data at the smallest --rows")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks([int(rows) for rows in args.rows], args.repeat, args.stages, args.seed)
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    if args.smoke:
+        report['analyses'] = run_all_analyses(int(min(args.rows)), args.seed)
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.out}")
+
+    if args.compare:
+        regressions = compare_results(results, json.loads(args.compare.read_text())['results'], args.threshold)
+        for record in regressions:
+            print(f"REGRESSION {record['stage']} at {record['rows']} rows: "
+                  f"{record['baseline_seconds'] * 1000:.2f} ms -> {record['seconds'] * 1000:.2f} ms "
+                  f"({record['ratio']:.2f}x)")
+        if regressions:
+            raise SystemExit(1)
+        print(f"No stage slower than {1 + args.threshold:.2f}x the baseline")
+
+
+if __name__ == '__main__':
+    main()
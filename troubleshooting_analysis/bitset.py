@@ -0,0 +1,126 @@
+"""Compact per-step behavior flags: one uint32 bitmask per observation step.
+
+Bit i of a step's mask is set when `columns[i]` was observed in that step, so
+the 19 action/strategy flags of a step fit in 4 bytes instead of 19 int64s.
+Student and step numbers are kept as parallel NumPy arrays.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .columns import BEHAVIOR_COLS
+
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(masks):
+    """Number of set bits in each uint32 mask"""
+    masks = np.asarray(masks, dtype=np.uint32)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.int64)
+    return _BYTE_POPCOUNT[masks.view(np.uint8).reshape(-1, 4)].sum(axis=1, dtype=np.int64)
+
+
+class BehaviorBitset:
+    """Per-step behavior bitmasks with parallel student and step index arrays"""
+
+    def __init__(self, masks, student_codes, steps, students, columns):
+        self.masks = np.asarray(masks, dtype=np.uint32)
+        self.student_codes = np.asarray(student_codes, dtype=np.int32)
+        self.steps = np.asarray(steps)
+        self.students = np.asarray(students, dtype=object)
+        self.columns = list(columns)
+        if len(self.columns) > 32:
+            raise ValueError(f"At most 32 behaviors fit in a uint32 mask, got {len(self.columns)}")
+        self._bit_index = {col: i for i, col in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, data, columns=BEHAVIOR_COLS):
+        """Pack the 0/1 behavior columns of a processed observation frame"""
+        columns = list(columns)
+        flags = data[columns].to_numpy(dtype=np.uint32)
+        masks = (flags << np.arange(len(columns), dtype=np.uint32)).sum(axis=1, dtype=np.uint32)
+
+        student_ids = data['student_id']
+        if isinstance(student_ids.dtype, pd.CategoricalDtype):
+            codes = student_ids.cat.codes.to_numpy()
+            students = student_ids.cat.categories.to_numpy()
+        else:
+            codes, students = pd.factorize(student_ids, sort=True)
+
+        steps = data['step'].to_numpy() if 'step' in data else np.zeros(len(data), dtype=np.int16)
+        return cls(masks, codes, steps, students, columns)
+
+    def __len__(self):
+        return len(self.masks)
+
+    @property
+    def nbytes(self):
+        return self.masks.nbytes
+
+    def bits(self, cols):
+        """Combined mask with the bit of every behavior in `cols` set"""
+        if isinstance(cols, str):
+            cols = [cols]
+        mask = 0
+        for col in cols:
+            mask |= 1 << self._bit_index[col]
+        return np.uint32(mask)
+
+    def has(self, col):
+        """Boolean array: which steps have behavior `col`"""
+        return (self.masks & self.bits(col)) != 0
+
+    def has_all(self, cols):
+        """Boolean array: which steps have every behavior in `cols`"""
+        wanted = self.bits(cols)
+        return (self.masks & wanted) == wanted
+
+    def has_any(self, cols):
+        """Boolean array: which steps have at least one behavior in `cols`"""
+        return (self.masks & self.bits(cols)) != 0
+
+    def count(self, cols=None):
+        """Number of behaviors (optionally restricted to `cols`) in each step"""
+        masks = self.masks if cols is None else self.masks & self.bits(cols)
+        return popcount(masks)
+
+    def to_matrix(self, cols=None):
+        """Unpack back into an (steps x behaviors) uint8 0/1 matrix"""
+        cols = self.columns if cols is None else list(cols)
+        shifts = np.array([self._bit_index[col] for col in cols], dtype=np.uint32)
+        return ((self.masks[:, None] >> shifts) & 1).astype(np.uint8)
+
+    def student_union(self):
+        """OR-reduce the step masks of each student ("did they ever use it").
+
+        Returns the IDs of the students that have at least one step and one
+        mask per student, in student order.
+        """
+        if len(self.masks) == 0:
+            return self.students[:0], np.zeros(0, dtype=np.uint32)
+
+        order = np.argsort(self.student_codes, kind='stable')
+        sorted_codes = self.student_codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        union = np.bitwise_or.reduceat(self.masks[order], starts)
+        return self.students[sorted_codes[starts]], union
+
+    def students_with(self, cols):
+        """IDs of students who used every behavior in `cols` somewhere in their session"""
+        student_ids, union = self.student_union()
+        wanted = self.bits(cols)
+        return student_ids[(union & wanted) == wanted]
+
+    def student_usage(self, cols=None):
+        """Student x behavior boolean table of whether each student ever used each behavior"""
+        cols = self.columns if cols is None else list(cols)
+        student_ids, union = self.student_union()
+        shifts = np.array([self._bit_index[col] for col in cols], dtype=np.uint32)
+        usage = ((union[:, None] >> shifts) & 1).astype(bool)
+        return pd.DataFrame(usage, index=pd.Index(student_ids, name='student_id'), columns=cols)
+
+    def subset(self, rows):
+        """New bitset holding only `rows` (a boolean mask or index array)"""
+        return BehaviorBitset(self.masks[rows], self.student_codes[rows], self.steps[rows],
+                              self.students, self.columns)
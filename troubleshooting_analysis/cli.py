@@ -0,0 +1,151 @@
+"""Command line for batch runs: `python -m troubleshooting_analysis <command>`.
+
+    run   Regenerate analysis outputs from one load of the data, headless, and
+          write a JSON run manifest with per-analysis timings and outputs
+          (`--trace trace.json` adds per-stage spans, see `tracing.py`;
+          `--profile DIR` writes a cProfile dump per analysis)
+    list  List the registered analyses
+
+Paths not given as flags come from the environment or a config file (see
+`config.py`), e.g.
+
+    UVA_TS_DATA=processed_observation_data.csv python -m troubleshooting_analysis run --out Updated_Outputs --workers 4
+"""
+
+import argparse
+import json
+import platform
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import matplotlib
+
+from . import tracing
+from .config import resolve_settings
+from .registry import ANALYSES, discover_analyses
+from .result_cache import CACHE_DIR_NAME, DEFAULT_MAX_BYTES
+
+MANIFEST_NAME = 'run_manifest.json'
+
+
+def _timestamp():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def run_command(args):
+    # Headless: figures are only ever saved, never shown
+    matplotlib.use('Agg')
+    from .context import AnalysisContext
+    from .result_cache import ResultCache
+    from .runner import run_analyses
+
+    settings = resolve_settings({
+        'data': args.data, 'out': args.out, 'cache_dir': args.cache_dir, 'manifest': args.manifest,
+        'jobs': args.jobs, 'workers': args.workers, 'trace': args.trace, 'profile_dir': args.profile,
+    }, args.config)
+    out = settings['out']
+    out.mkdir(parents=True, exist_ok=True)
+
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(settings.get('cache_dir') or out / CACHE_DIR_NAME, args.cache_size * 1024 ** 2)
+
+    tracer = tracing.enable(memory=args.trace_memory) if settings.get('trace') else None
+
+    discover_analyses()
+    started = _timestamp()
+    start = time.perf_counter()
+    print("Loading processed observation data...")
+    # Analyses that read settings of their own (e.g. outcome labels) see the same ones
+    ctx = AnalysisContext.load(settings['data'], settings)
+    load_seconds = time.perf_counter() - start
+
+    record = {}
+    timings = run_analyses(ctx, out, args.analyses or None, processes=settings.get('jobs'), cache=cache,
+                           workers=settings.get('workers') or 1, record=record,
+                           profile_dir=settings.get('profile_dir'),
+                           figure_renderer='pillow' if args.fast_figures else None)
+
+    manifest = {
+        'started': started,
+        'finished': _timestamp(),
+        'total_seconds': time.perf_counter() - start,
+        'load_seconds': load_seconds,
+        'render_seconds': timings.get('render', 0.0),
+        'data': str(settings['data']),
+        'data_fingerprint': ctx.fingerprint,
+        'rows': len(ctx.df),
+        'out': str(out),
+        'workers': settings.get('workers') or 1,
+        'python': platform.python_version(),
+        'analyses': {name: {'seconds': timings[name], **record[name]} for name in record},
+    }
+    if tracer is not None:
+        tracing.disable()
+        manifest['trace'] = str(tracer.write_chrome_trace(settings['trace']))
+        manifest['stages'] = tracer.summary()
+    manifest_path = settings.get('manifest') or out / MANIFEST_NAME
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+
+    print("\nAnalysis timings:")
+    for name, seconds in timings.items():
+        print(f"  {name}: {seconds:.2f}s")
+    if tracer is not None:
+        print("\nSlowest stages (wall / CPU seconds):")
+        for stage in manifest['stages'][:15]:
+            print(f"  [{stage['category']}] {stage['name']} x{stage['calls']}: "
+                  f"{stage['wall_seconds']:.2f}s / {stage['cpu_seconds']:.2f}s")
+        print(f"Trace written to {manifest['trace']}")
+    print(f"Run manifest written to {manifest_path}")
+
+
+def list_command(args):
+    discover_analyses()
+    for name, (_, output_dir) in ANALYSES.items():
+        print(f"{name}  ->  {output_dir}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m troubleshooting_analysis',
+                                     description="UVA troubleshooting observation analyses")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Regenerate analysis outputs from one data load")
+    run.add_argument('--data', type=Path, default=None, help="processed_observation_data.csv (or UVA_TS_DATA)")
+    run.add_argument('--out', type=Path, default=None, help="Output root directory (or UVA_TS_OUT)")
+    run.add_argument('--config', type=Path, default=None, help="Config file (.toml or .json) with the same keys")
+    run.add_argument('--analyses', nargs='*', default=None, help="Analyses to run (default: all)")
+    run.add_argument('--jobs', type=int, default=None, help="Figure rendering processes (default: one per CPU)")
+    run.add_argument('--workers', type=int, default=None, help="Analyses run in parallel (default: 1)")
+    run.add_argument('--manifest', type=Path, default=None, help=f"Run manifest path (default: <out>/{MANIFEST_NAME})")
+    run.add_argument('--cache-dir', type=Path, default=None,
+                     help=f"Result cache directory (default: <out>/{CACHE_DIR_NAME})")
+    run.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                     help="Result cache size limit in MB")
+    run.add_argument('--no-cache', action='store_true', help="Recompute everything")
+    run.add_argument('--fast-figures', action='store_true',
+                     help="Render heatmaps straight to PNG with Pillow (faster, simpler layout)")
+    run.add_argument('--trace', type=Path, default=None,
+                     help="Record per-stage spans and write them as a Chrome trace (or UVA_TS_TRACE)")
+    run.add_argument('--trace-memory', action='store_true',
+                     help="Also record each stage's peak allocation (tracemalloc, slows the run)")
+    run.add_argument('--profile', type=Path, default=None, help="Write a cProfile dump per analysis to this directory")
+    # Analyses can also be given positionally, as with the original runner
+    run.add_argument('names', nargs='*', help=argparse.SUPPRESS)
+    run.set_defaults(func=run_command)
+
+    listing = commands.add_parser('list', help="List the registered analyses")
+    listing.set_defaults(func=list_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'names', None):
+        args.analyses = (args.analyses or []) + args.names
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Behavior column names shared by every analysis."""
+
+# Student ID of Caroline's expert observation (the ground-truth "master scan")
+MASTER_SCAN_ID = 'ECE_ScanMaster'
+
+ACTION_COLS = [
+    'Using scope', 'Reference data sheet', 'Reading schematic',
+    'Visually inspecting circuit', 'Tracing schematic/ circuit',
+    'Reasoning through the circuit', 'Analytic calculations',
+    'Makes a hypothesis', 'Modify circuit using hypothesis',
+    'Modify circuit w/ no clear rationale', 'Other'
+]
+
+STRATEGY_COLS = [
+    'Trial and error', 'Consider alternatives', 'Rebuild', 'Tracing',
+    'Isolation / split half', 'Output testing', 'Gain domain knowledge',
+    'Pattern matching'
+]
+
+BEHAVIOR_COLS = ACTION_COLS + STRATEGY_COLS
+
+# Shorter labels used on figure axes
+ACTION_SHORT_LABELS = [
+    'Scope', 'Data sheet', 'Schematic', 'Visual inspect', 'Trace circuit',
+    'Reasoning', 'Calculations', 'Hypothesis', 'Modify (hyp)', 'Modify (no rationale)', 'Other'
+]
+
+STRATEGY_SHORT_LABELS = [
+    'Trial/error', 'Consider alt', 'Rebuild', 'Tracing',
+    'Isolation', 'Output test', 'Gain knowledge', 'Pattern match'
+]
@@ -0,0 +1,100 @@
+"""Compare what students observed against one or more ground-truth scans.
+
+Every student is reduced once to a student x behavior boolean row ("did they
+mark it anywhere in their session") and every ground-truth scan to a boolean
+behavior vector. All comparisons are then matrix products over those two
+tables: students x scans true/false positive and false negative counts, and
+scans x behavior over/under-observation rates, precision and recall. Adding
+more expert scans (e.g. one per video) only adds rows to the scan table.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .bitset import BehaviorBitset
+from .columns import BEHAVIOR_COLS, MASTER_SCAN_ID
+from .tracing import traced
+
+
+@traced()
+def scan_usage(data, scan_ids=(MASTER_SCAN_ID,), columns=BEHAVIOR_COLS):
+    """Scan x behavior boolean table of the behaviors each ground-truth scan marked"""
+    scan_ids = list(scan_ids)
+    rows = data[data['student_id'].isin(scan_ids)]
+    usage = BehaviorBitset.from_frame(rows, columns).student_usage()
+    # Scans without any step keep an all-False row
+    return usage.reindex(pd.Index(scan_ids, name='scan_id'), fill_value=False)
+
+
+@dataclass
+class ScanComparison:
+    """Student observations compared against each ground-truth scan
+
+    Student tables are indexed by student ID with one column per scan. Behavior
+    tables are indexed by scan ID with one column per behavior. Rates are
+    fractions of the compared students; precision is NaN where no student
+    marked the behavior and recall is NaN where the scan did not mark it.
+    """
+    in_scan: pd.DataFrame
+    students_observed: pd.Series
+    observed_rate: pd.Series
+    over_observed_rate: pd.DataFrame
+    under_observed_rate: pd.DataFrame
+    precision: pd.DataFrame
+    recall: pd.DataFrame
+    true_positives: pd.DataFrame
+    false_positives: pd.DataFrame
+    false_negatives: pd.DataFrame
+
+
+@traced()
+def compare_to_scans(usage, scans):
+    """Compare a student x behavior usage table against a scan x behavior table.
+
+    Only the behaviors (columns) of `scans` are compared; `usage` must have all
+    of them.
+    """
+    columns = list(scans.columns)
+    observed = usage[columns].to_numpy(dtype=bool)
+    truth = scans.to_numpy(dtype=bool)
+    n_students = len(observed)
+
+    # students x scans counts as products of the 0/1 tables
+    observed_int = observed.astype(np.int64)
+    truth_int = truth.astype(np.int64)
+    true_positives = observed_int @ truth_int.T
+    false_positives = observed_int @ (1 - truth_int).T
+    false_negatives = (1 - observed_int) @ truth_int.T
+
+    # scans x behaviors: every student is compared against the same scan vector,
+    # so the per-behavior counts only need the number of students who marked it
+    n_observed = observed.sum(axis=0)
+    rate = n_observed / n_students if n_students else np.zeros(len(columns))
+    # A marked behavior is all true positives if the scan has it, all false ones otherwise
+    precision = np.where(n_observed > 0, truth.astype(float), np.nan)
+    recall = np.where(truth, rate, np.nan)
+
+    student_index = usage.index
+    scan_index = scans.index
+    behavior_index = pd.Index(columns, name='behavior')
+
+    def by_student(values):
+        return pd.DataFrame(values, index=student_index, columns=scan_index)
+
+    def by_scan(values):
+        return pd.DataFrame(values, index=scan_index, columns=behavior_index)
+
+    return ScanComparison(
+        in_scan=by_scan(truth),
+        students_observed=pd.Series(n_observed, index=behavior_index),
+        observed_rate=pd.Series(rate, index=behavior_index),
+        over_observed_rate=by_scan(np.where(truth, 0.0, rate)),
+        under_observed_rate=by_scan(np.where(truth, 1.0 - rate, 0.0)),
+        precision=by_scan(precision),
+        recall=by_scan(recall),
+        true_positives=by_student(true_positives),
+        false_positives=by_student(false_positives),
+        false_negatives=by_student(false_negatives),
+    )
@@ -0,0 +1,89 @@
+"""Where the data and outputs live, from arguments, environment or a config file.
+
+Each setting is taken from the first of:
+1. an explicit argument (CLI flag)
+2. an environment variable (`UVA_TS_DATA`, `UVA_TS_OUT`, ...)
+3. a config file: `--config`, `UVA_TS_CONFIG`, or `uva_ts.toml` / `uva_ts.json`
+   in the working directory, with the same keys in lower case without the
+   prefix (`data = "..."`, `out = "..."`)
+4. the original analysis machine's layout, so the standalone scripts behave as
+   before when nothing is configured
+
+`UVA_TS_HEADLESS=1` (or a non-interactive `MPLBACKEND` such as Agg) keeps the
+standalone scripts from opening figure windows.
+"""
+
+import json
+import os
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: JSON config files only
+    tomllib = None
+
+ENV_PREFIX = 'UVA_TS_'
+CONFIG_FILE_NAMES = ['uva_ts.toml', 'uva_ts.json']
+
+LEGACY_BASE_PATH = Path("/Users/willhammond/Summer '25 Research/Data Analysis (ECE)/troubleshooting_analysis_system")
+DEFAULTS = {
+    'data': LEGACY_BASE_PATH / "outputs" / "data_exports" / "processed_observation_data.csv",
+    'out': LEGACY_BASE_PATH / "Updated_Outputs",
+}
+PATH_KEYS = {'data', 'out', 'cache_dir', 'manifest', 'trace', 'profile_dir', 'outcomes', 'phase2_data'}
+INT_KEYS = {'jobs', 'workers'}
+# Comma-separated in environment variables
+LIST_KEYS = {'outcome_strata'}
+
+
+def read_config_file(path):
+    """Settings from a .toml or .json config file"""
+    path = Path(path)
+    if path.suffix == '.toml':
+        if tomllib is None:
+            raise RuntimeError(f"Reading {path} needs Python 3.11+ (tomllib); use a .json config instead")
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    return json.loads(path.read_text())
+
+
+def _config_file(config_path=None):
+    config_path = config_path or os.environ.get(ENV_PREFIX + 'CONFIG')
+    if config_path:
+        return read_config_file(config_path)
+    for name in CONFIG_FILE_NAMES:
+        if Path(name).exists():
+            return read_config_file(name)
+    return {}
+
+
+def resolve_settings(overrides=None, config_path=None):
+    """Merge defaults, config file, environment and `overrides` (None values ignored)"""
+    settings = dict(DEFAULTS)
+    settings.update(_config_file(config_path))
+    for key in set(settings) | PATH_KEYS | INT_KEYS | LIST_KEYS:
+        value = os.environ.get(ENV_PREFIX + key.upper())
+        if value is not None:
+            settings[key] = value
+    settings.update({key: value for key, value in (overrides or {}).items() if value is not None})
+    for key, value in settings.items():
+        if value is not None and key in PATH_KEYS:
+            settings[key] = Path(value)
+        elif value is not None and key in INT_KEYS:
+            settings[key] = int(value)
+        elif isinstance(value, str) and key in LIST_KEYS:
+            settings[key] = [item.strip() for item in value.split(',') if item.strip()]
+    return settings
+
+
+def script_paths(output_subdir):
+    """(data CSV, output directory) for a standalone analysis script"""
+    settings = resolve_settings()
+    return settings['data'], settings['out'] / output_subdir
+
+
+def interactive():
+    """Whether standalone scripts should display their figures"""
+    if os.environ.get(ENV_PREFIX + 'HEADLESS', '').lower() not in ('', '0', 'false', 'no'):
+        return False
+    return os.environ.get('MPLBACKEND', '').lower() not in ('agg', 'pdf', 'svg', 'ps', 'cairo', 'template')
@@ -0,0 +1,120 @@
+"""Observation data and the derived frames shared by every analysis in a run."""
+
+from functools import cached_property
+
+from .alignment import align_to_reference
+from .bitset import BehaviorBitset
+from .columns import ACTION_COLS, BEHAVIOR_COLS, MASTER_SCAN_ID, STRATEGY_COLS
+from .comparison import compare_to_scans, scan_usage
+from .config import resolve_settings
+from .cooccurrence import cooccurrence_matrix
+from .index import BehaviorIndex
+from .result_cache import data_fingerprint
+from .sessions import SessionIndex
+from .store import load_observations, master_rows, student_rows
+from .tracing import traced
+
+
+class AnalysisContext:
+    """Observation data plus the derived frames shared between analyses.
+
+    Derived frames are computed lazily and cached, and must be treated as
+    read-only by the analyses. `settings` are the resolved settings (see
+    `config.py`) analyses read beyond the data, e.g. outcome labels; by default
+    they come from the environment and config file. `processes` is the pool
+    size analyses give their own parallel computations (None: one per CPU).
+    """
+
+    def __init__(self, df, settings=None, processes=None):
+        self.df = df
+        self.settings = resolve_settings() if settings is None else settings
+        self.processes = processes
+
+    @classmethod
+    def load(cls, data_path, settings=None, **load_kwargs):
+        return cls(load_observations(data_path, **load_kwargs), settings)
+
+    @cached_property
+    def fingerprint(self):
+        """Content hash of the observation data (result cache key)"""
+        return data_fingerprint(self.df)
+
+    @cached_property
+    @traced('filter', rows='output')
+    def student_data(self):
+        """Student step observations (master scan excluded)"""
+        return student_rows(self.df)
+
+    @cached_property
+    @traced('filter', rows='output')
+    def master_data(self):
+        """ECE_ScanMaster step observations (ground truth)"""
+        return master_rows(self.df)
+
+    @cached_property
+    @traced('compute', rows='output')
+    def student_bits(self):
+        return BehaviorBitset.from_frame(self.student_data, BEHAVIOR_COLS)
+
+    @cached_property
+    @traced('compute', rows='output')
+    def sessions(self):
+        """Start/end offsets of every student session for first/last step queries"""
+        return SessionIndex(self.student_bits)
+
+    @cached_property
+    @traced('compute', rows='output')
+    def behavior_index(self):
+        """Inverted index over the student steps for behavior queries"""
+        return BehaviorIndex(self.student_data, BEHAVIOR_COLS)
+
+    @cached_property
+    @traced('compute', rows='output')
+    def behavior_usage(self):
+        """Student x behavior table: did the student use the behavior at all?"""
+        return self.student_bits.student_usage()
+
+    @cached_property
+    def strategy_students(self):
+        """Students with any strategy observation (NEW observation sheets)"""
+        usage = self.behavior_usage
+        return usage.index[usage[STRATEGY_COLS].any(axis=1)]
+
+    @cached_property
+    def temporal_cooccurrence(self):
+        """Same-step co-occurrence counts of every behavior pair over the student steps;
+        analyses take their layout of it with `select`/`flip_rows`/`relabel`"""
+        return cooccurrence_matrix(self.student_data, BEHAVIOR_COLS)
+
+    @cached_property
+    def usage_cooccurrence(self):
+        """Student-level (non-temporal) co-occurrence counts of every behavior pair"""
+        return cooccurrence_matrix(self.behavior_usage, BEHAVIOR_COLS)
+
+    @cached_property
+    @traced('filter', rows='output')
+    def strategy_student_data(self):
+        """Step observations of the NEW-sheet students only"""
+        return self.student_data[self.student_data['student_id'].isin(self.strategy_students)]
+
+    @cached_property
+    @traced('compute', rows='output')
+    def master_comparison(self):
+        """Every student's behavior usage compared against the master scan"""
+        return compare_to_scans(self.behavior_usage, scan_usage(self.df, [MASTER_SCAN_ID]))
+
+    @cached_property
+    @traced('compute', rows='output')
+    def master_alignment(self):
+        """Every student's step sequence aligned against the master scan's steps"""
+        return align_to_reference(self.student_data, self.master_data, BEHAVIOR_COLS)
+
+    @cached_property
+    def master_actions(self):
+        """Actions that appear anywhere in the master scan"""
+        return {col for col in ACTION_COLS if (self.master_data[col] == 1).any()}
+
+    @cached_property
+    def master_strategies(self):
+        """Strategies that appear anywhere in the master scan"""
+        return {col for col in STRATEGY_COLS if (self.master_data[col] == 1).any()}
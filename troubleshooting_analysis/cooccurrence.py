@@ -0,0 +1,137 @@
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+from .bitset import BehaviorBitset
+from .tracing import traced
+
+
+def behavior_matrix(data, cols):
+    """Return the 0/1 flags for `cols` as an (observations x behaviors) uint8 array"""
+    return data[list(cols)].to_numpy(dtype=np.uint8)
+
+
+@traced()
+def cooccurrence_counts(data, row_cols, col_cols=None):
+    """Count observations that have both the row behavior and the column behavior.
+
+    Returns the pair counts (X.T @ Y) and the number of observations that have
+    each row behavior. For a square matrix the row totals are the diagonal.
+    """
+    if col_cols is None:
+        col_cols = row_cols
+
+    x = behavior_matrix(data, row_cols)
+    y = x if list(col_cols) == list(row_cols) else behavior_matrix(data, col_cols)
+
+    # Upcast once for the product so the uint8 flags can't overflow
+    pair_counts = x.T.astype(np.int64) @ y
+    row_totals = x.sum(axis=0, dtype=np.int64)
+    return pair_counts, row_totals
+
+
+def normalize_rows(pair_counts, row_totals):
+    """Turn pair counts into "% of rows with X that also have Y" (0 where X never occurs)"""
+    percentages = np.zeros(pair_counts.shape)
+    has_rows = row_totals > 0
+    percentages[has_rows] = (pair_counts[has_rows] / row_totals[has_rows, None]) * 100
+    return percentages
+
+
+@traced()
+def conditional_cooccurrence(data, row_cols, col_cols=None):
+    """Conditional co-occurrence matrix: for each row behavior X, what % of the
+    observations with X also have column behavior Y?
+
+    `data` can be step-level rows (temporal co-occurrence) or a student-level
+    usage table (non-temporal co-occurrence); see `student_usage`.
+    """
+    pair_counts, row_totals = cooccurrence_counts(data, row_cols, col_cols)
+    return normalize_rows(pair_counts, row_totals)
+
+
+@traced()
+def student_usage(data, cols):
+    """Student x behavior table of whether each student used each behavior at all"""
+    return BehaviorBitset.from_frame(data, cols).student_usage()
+
+
+@dataclass(frozen=True)
+class CooccurrenceMatrix:
+    """Pair counts over `behaviors`, computed once, shown through a layout.
+
+    `rows` and `cols` index the canonical behaviors in display order (top to
+    bottom, left to right). Reordering, subsetting, flipping and relabelling
+    return a new layout sharing the same count arrays, so every layout of a
+    figure costs a render only; a layout's matrix is gathered from the counts
+    when it is read.
+    """
+    pair_counts: np.ndarray
+    totals: np.ndarray
+    behaviors: tuple
+    rows: np.ndarray = None
+    cols: np.ndarray = None
+    # behavior -> label shown on the axes (behaviors without one show their name)
+    display_names: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        everything = np.arange(len(self.behaviors))
+        if self.rows is None:
+            object.__setattr__(self, 'rows', everything)
+        if self.cols is None:
+            object.__setattr__(self, 'cols', everything)
+
+    def _indices(self, names):
+        positions = {behavior: i for i, behavior in enumerate(self.behaviors)}
+        return np.array([positions[name] for name in names], dtype=np.intp)
+
+    def select(self, rows=None, cols=None):
+        """Show these behaviors, in this order (`cols` defaults to `rows`)"""
+        rows = self.rows if rows is None else self._indices(rows)
+        cols = rows if cols is None else self._indices(cols)
+        return replace(self, rows=rows, cols=cols)
+
+    def flip_rows(self):
+        return replace(self, rows=self.rows[::-1])
+
+    def flip_cols(self):
+        return replace(self, cols=self.cols[::-1])
+
+    def relabel(self, display_names):
+        """Show behaviors under new axis labels ({behavior: label})"""
+        return replace(self, display_names={**self.display_names, **display_names})
+
+    @property
+    def row_behaviors(self):
+        return [self.behaviors[i] for i in self.rows]
+
+    @property
+    def col_behaviors(self):
+        return [self.behaviors[i] for i in self.cols]
+
+    @property
+    def row_labels(self):
+        return [self.display_names.get(behavior, behavior) for behavior in self.row_behaviors]
+
+    @property
+    def col_labels(self):
+        return [self.display_names.get(behavior, behavior) for behavior in self.col_behaviors]
+
+    @property
+    def counts(self):
+        return self.pair_counts[np.ix_(self.rows, self.cols)]
+
+    @property
+    def percentages(self):
+        """% of the observations with the row behavior that also have the column behavior"""
+        return normalize_rows(self.counts, self.totals[self.rows])
+
+    def to_frame(self):
+        return pd.DataFrame(self.percentages, index=self.row_labels, columns=self.col_labels)
+
+
+def cooccurrence_matrix(data, cols):
+    """`CooccurrenceMatrix` of every pair of `cols` in `data` (steps or a usage table)"""
+    pair_counts, totals = cooccurrence_counts(data, cols)
+    return CooccurrenceMatrix(pair_counts, totals, tuple(cols))
@@ -0,0 +1,89 @@
+"""Comprehensive Difference Index: how far each student's observation sheet is
+from the expert master scan.
+
+Four components, each scaled to 0 (identical to the master scan) .. 1:
+- content: Jaccard distance between the behaviors the student marked anywhere
+  and the behaviors the master scan marked
+- temporal: edit distance between the student's and the master scan's step
+  sequences, with a substitution costing the Jaccard distance of the two steps'
+  behavior bitmasks, divided by the longer sequence length
+- quantitative: relative difference in the total number of behavior marks
+- consistency: cosine distance between the per-behavior step frequency profiles
+
+The index is their weighted mean times 100. Every component is computed for
+all students at once over the padded (students x steps) bitmask array; the
+edit distance is the batch alignment cost from `alignment.py`.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .alignment import align_to_reference, mask_distance, padded_sequences
+from .bitset import BehaviorBitset, popcount
+from .columns import ACTION_COLS
+from .tracing import traced
+
+COMPONENTS = ['content', 'temporal', 'quantitative', 'consistency']
+
+# (upper bound, label); an index below the bound gets the label
+DIFFERENCE_BANDS = [
+    (20, 'Expert-like'),
+    (40, 'Good accuracy'),
+    (60, 'Moderate differences'),
+    (80, 'Significant differences'),
+    (np.inf, 'Very different'),
+]
+
+
+@traced()
+def difference_index(student_data, master_data, columns=ACTION_COLS, weights=None):
+    """Score every student's observations against the master scan.
+
+    Returns a frame indexed by student ID with one column per component, the
+    weighted `index` (0-100) and its `band` label. `weights` maps component
+    names to weights (default: equal).
+    """
+    weights = weights or dict.fromkeys(COMPONENTS, 1.0)
+    student_ids, sequences, _, lengths = padded_sequences(BehaviorBitset.from_frame(student_data, columns))
+    _, master_sequence, _, master_length = padded_sequences(BehaviorBitset.from_frame(master_data, columns))
+    if len(master_length) != 1:
+        raise ValueError(f"Expected one master scan, got {len(master_length)}")
+    master_sequence = master_sequence[0]
+    master_length = master_length[0]
+
+    # Content: behaviors marked anywhere in the session
+    student_union = np.bitwise_or.reduce(sequences, axis=1) if sequences.size else np.zeros(len(lengths), np.uint32)
+    master_union = np.bitwise_or.reduce(master_sequence)
+    content = mask_distance(student_union, master_union)
+
+    # Temporal: step-aligned edit distance, per step of the longer session
+    temporal = align_to_reference(student_data, master_data, columns).distance
+    temporal = temporal / np.maximum(np.maximum(lengths, master_length), 1)
+
+    # Quantitative: total behavior marks across all steps
+    student_marks = popcount(sequences.ravel()).reshape(sequences.shape).sum(axis=1)
+    master_marks = popcount(master_sequence).sum()
+    larger = np.maximum(np.maximum(student_marks, master_marks), 1)
+    quantitative = np.abs(student_marks - master_marks) / larger
+
+    # Consistency: share of steps with each behavior, compared by cosine distance
+    shifts = np.arange(len(columns), dtype=np.uint32)
+    student_profile = ((sequences[:, :, None] >> shifts) & 1).sum(axis=1) / np.maximum(lengths, 1)[:, None]
+    master_profile = ((master_sequence[:, None] >> shifts) & 1).sum(axis=0) / max(master_length, 1)
+    norms = np.linalg.norm(student_profile, axis=1) * np.linalg.norm(master_profile)
+    similarity = np.divide(student_profile @ master_profile, norms, out=np.zeros(len(lengths)), where=norms > 0)
+    consistency = 1 - np.clip(similarity, 0, 1)
+
+    scores = pd.DataFrame({
+        'content': content,
+        'temporal': temporal,
+        'quantitative': quantitative,
+        'consistency': consistency,
+    }, index=pd.Index(student_ids, name='student_id'))
+
+    weight_values = np.array([weights.get(component, 0.0) for component in COMPONENTS], dtype=float)
+    scores['index'] = scores[COMPONENTS].to_numpy() @ weight_values / weight_values.sum() * 100
+    bounds = [bound for bound, _ in DIFFERENCE_BANDS]
+    labels = np.array([label for _, label in DIFFERENCE_BANDS])
+    scores['band'] = labels[np.searchsorted(bounds, scores['index'].to_numpy(), side='right')]
+    return scores
@@ -0,0 +1,149 @@
+"""Inverted index over step observations for ad-hoc behavior queries.
+
+For every behavior the index keeps the sorted row positions of the steps where
+it was observed and the sorted codes of the students who ever used it. A query
+such as "steps with A and B but not C" or "students who used A and B at some
+point" is then a handful of sorted-array intersections/unions/differences over
+those posting lists instead of a scan of the observation frame.
+
+The index also groups the rows by student, CSR style: the frame is sorted once
+by (student, step) and each student's session is the slice between two
+offsets, so fetching one student's session, or the row of a given step of it,
+is a slice or a binary search within the session instead of a boolean filter
+over the whole frame.
+"""
+
+from functools import cached_property, reduce
+
+import numpy as np
+
+from .bitset import BehaviorBitset
+from .columns import BEHAVIOR_COLS
+from .transitions import step_links
+
+
+def _as_list(cols):
+    return [cols] if isinstance(cols, str) else list(cols)
+
+
+def _match(postings, universe, all_of, any_of, none_of):
+    """Combine posting lists: in every `all_of`, in at least one `any_of`, in no `none_of`"""
+    result = None
+    # Intersect the shortest lists first so the intermediate results stay small
+    for col in sorted(_as_list(all_of), key=lambda col: len(postings[col])):
+        result = postings[col] if result is None else np.intersect1d(result, postings[col], assume_unique=True)
+    any_of = _as_list(any_of)
+    if any_of:
+        union = reduce(np.union1d, [postings[col] for col in any_of])
+        result = union if result is None else np.intersect1d(result, union, assume_unique=True)
+    if result is None:
+        result = universe
+    for col in _as_list(none_of):
+        result = np.setdiff1d(result, postings[col], assume_unique=True)
+    return result
+
+
+class BehaviorIndex:
+    """Behavior -> step rows and behavior -> students posting lists over `data`"""
+
+    def __init__(self, data, columns=BEHAVIOR_COLS):
+        self.data = data
+        bits = BehaviorBitset.from_frame(data, columns)
+        self.columns = bits.columns
+        self.student_ids = bits.students
+        codes = bits.student_codes
+
+        flags = bits.to_matrix().T.copy()
+        self.step_rows = {col: np.flatnonzero(flags[i]) for i, col in enumerate(self.columns)}
+        self.student_codes = {col: np.unique(codes[rows]) for col, rows in self.step_rows.items()}
+        self._all_rows = np.arange(len(data))
+        self._all_students = np.unique(codes)
+
+        # Rows in (student, step) order and where each student's session starts/ends in it
+        self._session_order = np.lexsort((bits.steps, codes))
+        sorted_codes = codes[self._session_order]
+        student_range = np.arange(len(self.student_ids))
+        self._session_start = np.searchsorted(sorted_codes, student_range, side='left')
+        self._session_stop = np.searchsorted(sorted_codes, student_range, side='right')
+        self._code_of = {student_id: code for code, student_id in enumerate(self.student_ids)}
+        self._sorted_bits = bits.subset(self._session_order)
+        # Position of each data row in session order
+        self._sorted_position = np.empty(len(data), dtype=np.int64)
+        self._sorted_position[self._session_order] = np.arange(len(data))
+
+    def steps(self, all_of=(), any_of=(), none_of=()):
+        """Row positions (into `data`) of the steps with every behavior in
+        `all_of`, at least one in `any_of` and none in `none_of`"""
+        return _match(self.step_rows, self._all_rows, all_of, any_of, none_of)
+
+    def students(self, all_of=(), any_of=(), none_of=()):
+        """IDs of the students who at some point used every behavior in
+        `all_of`, at least one in `any_of` and never one in `none_of`"""
+        return self.student_ids[_match(self.student_codes, self._all_students, all_of, any_of, none_of)]
+
+    def count(self, all_of=(), any_of=(), none_of=()):
+        """Number of steps matching the query"""
+        return len(self.steps(all_of, any_of, none_of))
+
+    def frame(self, rows):
+        """The observation rows at the given positions"""
+        return self.data.iloc[rows]
+
+    def session_rows(self, student_ids):
+        """Row positions of the given students' sessions, by student then step"""
+        codes = [self._code_of[student_id] for student_id in student_ids if student_id in self._code_of]
+        codes = np.sort(np.asarray(codes, dtype=np.int64))
+        slices = [self._session_order[self._session_start[code]:self._session_stop[code]] for code in codes]
+        return np.concatenate(slices) if slices else np.zeros(0, dtype=np.int64)
+
+    def sessions(self, student_ids):
+        """The given students' complete sessions, sorted by student then step"""
+        return self.frame(self.session_rows(student_ids))
+
+    @cached_property
+    def sorted_data(self):
+        """`data` sorted by student then step (built on first use)"""
+        return self.data.iloc[self._session_order]
+
+    def _bounds(self, student_id):
+        code = self._code_of.get(student_id)
+        if code is None:
+            return 0, 0
+        return self._session_start[code], self._session_stop[code]
+
+    def session(self, student_id):
+        """One student's complete session, sorted by step (a slice of `sorted_data`;
+        empty for an unknown student)"""
+        start, stop = self._bounds(student_id)
+        return self.sorted_data.iloc[start:stop]
+
+    def _step_offset(self, student_id, step):
+        """Position in `sorted_data` of the student's `step` (-1 if not observed)"""
+        start, stop = self._bounds(student_id)
+        offset = start + np.searchsorted(self._sorted_bits.steps[start:stop], step)
+        if offset < stop and self._sorted_bits.steps[offset] == step:
+            return offset
+        return -1
+
+    def step(self, student_id, step):
+        """The student's row(s) for `step` as a slice of `sorted_data` (empty if
+        the step was not observed)"""
+        start, stop = self._bounds(student_id)
+        steps = self._sorted_bits.steps[start:stop]
+        return self.sorted_data.iloc[start + np.searchsorted(steps, step, side='left'):
+                                     start + np.searchsorted(steps, step, side='right')]
+
+    def step_behaviors(self, student_id, step):
+        """Behaviors observed in the student's `step` (read off its bitmask), or
+        None if the step was not observed"""
+        offset = self._step_offset(student_id, step)
+        if offset < 0:
+            return None
+        mask = int(self._sorted_bits.masks[offset])
+        return [col for i, col in enumerate(self.columns) if mask >> i & 1]
+
+    def neighbor_rows(self, rows, lag=1):
+        """Row positions (into `data`) of the same student's step + `lag` for each
+        of `rows` (-1 where that step was not observed)"""
+        links = step_links(self._sorted_bits, lag)[self._sorted_position[np.asarray(rows, dtype=np.int64)]]
+        return np.where(links >= 0, self._session_order[np.maximum(links, 0)], -1)
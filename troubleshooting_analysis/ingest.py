@@ -0,0 +1,185 @@
+"""Streaming conversion of the raw observation master sheets.
+
+The raw exports ("UVA_Troubleshooting Data_ Master - ECE.csv" / "- Capstone.csv")
+have a multi-row header: a group row ("Observation sheet", "Actions",
+"Strategies") above the column names, possibly with names spread over several
+rows. Each student's ID is only written on their first step row and a behavior
+is marked with 'T'.
+
+`detect_layout` reads just the header rows and works out which column holds
+the student ID, the step and each behavior, and whether the sheet is the OLD
+layout (actions only) or the NEW one (actions and strategies).
+`iter_raw_observations` then reads the data rows in chunks and yields them in
+the processed observation format (student_id, step, one 0/1 uint8 column per
+behavior in `BEHAVIOR_COLS` order, strategies all 0 for OLD sheets), so large
+exports are converted without being loaded whole.
+"""
+
+import argparse
+import csv
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .columns import ACTION_COLS, BEHAVIOR_COLS, STRATEGY_COLS
+
+OLD_SHEET = 'OLD'
+NEW_SHEET = 'NEW'
+
+ID_HEADERS = {'id number', 'id', 'student id', 'student_id'}
+STEP_HEADERS = {'step', 'step number'}
+FLAG_VALUES = {'T', 'TRUE'}
+
+
+def _normalize(cell):
+    return ' '.join(str(cell).split()).lower()
+
+
+@dataclass
+class RawSheetLayout:
+    """Where the fields of a raw master sheet are"""
+    schema: str
+    id_col: int
+    step_col: int
+    behavior_cols: dict
+    data_start: int
+    n_cols: int
+
+
+def detect_layout(path, max_header_rows=10):
+    """Find the ID, step and behavior columns of a raw sheet from its header rows.
+
+    Column names may be spread over several header rows; each column takes the
+    first recognized name found in any of them. The data starts after the last
+    header row that named a column.
+    """
+    wanted = {_normalize(col): col for col in BEHAVIOR_COLS}
+    behavior_cols, id_col, step_col = {}, None, None
+    last_header_row = None
+    n_cols = 0
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row_idx, row in enumerate(csv.reader(f)):
+            if row_idx >= max_header_rows:
+                break
+            n_cols = max(n_cols, len(row))
+            for col_idx, cell in enumerate(row):
+                name = _normalize(cell)
+                if name in wanted and wanted[name] not in behavior_cols:
+                    behavior_cols[wanted[name]] = col_idx
+                elif name in ID_HEADERS and id_col is None:
+                    id_col = col_idx
+                elif name in STEP_HEADERS and step_col is None:
+                    step_col = col_idx
+                else:
+                    continue
+                last_header_row = row_idx
+
+    missing_actions = [col for col in ACTION_COLS if col not in behavior_cols]
+    if last_header_row is None or missing_actions:
+        raise ValueError(f"{path}: no action columns found in the first {max_header_rows} rows "
+                         f"(missing: {', '.join(missing_actions)})")
+
+    strategies_found = [col for col in STRATEGY_COLS if col in behavior_cols]
+    if not strategies_found:
+        schema = OLD_SHEET
+    elif len(strategies_found) == len(STRATEGY_COLS):
+        schema = NEW_SHEET
+    else:
+        missing = [col for col in STRATEGY_COLS if col not in behavior_cols]
+        raise ValueError(f"{path}: incomplete strategy columns (missing: {', '.join(missing)})")
+
+    return RawSheetLayout(
+        schema=schema,
+        id_col=0 if id_col is None else id_col,
+        step_col=1 if step_col is None else step_col,
+        behavior_cols=behavior_cols,
+        data_start=last_header_row + 1,
+        n_cols=n_cols,
+    )
+
+
+def iter_raw_observations(path, chunksize=50_000, layout=None):
+    """Yield the data rows of a raw sheet as processed observation frames, one per chunk.
+
+    Student IDs are forward-filled across chunk boundaries. Rows before the
+    first student ID, rows without a numeric step (blank lines, repeated
+    header rows) are dropped.
+    """
+    layout = layout or detect_layout(path)
+    reader = pd.read_csv(
+        path, header=None, names=range(layout.n_cols), skiprows=layout.data_start,
+        usecols=[layout.id_col, layout.step_col, *layout.behavior_cols.values()],
+        dtype=str, keep_default_na=False, chunksize=chunksize, encoding='utf-8-sig',
+    )
+
+    last_id = None
+    for chunk in reader:
+        student_ids = chunk[layout.id_col].str.strip().replace('', np.nan)
+        if last_id is not None and pd.isna(student_ids.iloc[0]):
+            student_ids.iloc[0] = last_id
+        student_ids = student_ids.ffill()
+        if student_ids.notna().any():
+            last_id = student_ids.dropna().iloc[-1]
+
+        steps = pd.to_numeric(chunk[layout.step_col].str.strip(), errors='coerce')
+        keep = (student_ids.notna() & steps.notna()).to_numpy()
+        if not keep.any():
+            continue
+
+        observations = pd.DataFrame({
+            'student_id': student_ids[keep].to_numpy(),
+            'step': steps[keep].to_numpy().astype(np.int16),
+        })
+        for col in BEHAVIOR_COLS:
+            if col in layout.behavior_cols:
+                flags = chunk[layout.behavior_cols[col]][keep].str.strip().str.upper().isin(FLAG_VALUES)
+                observations[col] = flags.to_numpy().astype(np.uint8)
+            else:
+                observations[col] = np.zeros(len(observations), dtype=np.uint8)
+        yield observations
+
+
+def convert_raw_sheets(paths, output_csv, chunksize=50_000):
+    """Append the observations of each raw sheet to `output_csv` chunk by chunk.
+
+    Returns the number of step observations written.
+    """
+    written = 0
+    with open(output_csv, 'w', newline='') as f:
+        for path in paths:
+            layout = detect_layout(path)
+            print(f"{path}: {layout.schema} sheet layout")
+            for observations in iter_raw_observations(path, chunksize, layout):
+                observations.to_csv(f, header=written == 0, index=False)
+                written += len(observations)
+    return written
+
+
+def load_raw_observations(paths, chunksize=50_000):
+    """Read raw sheets into one frame with the same dtypes as `load_observations`"""
+    chunks = [observations for path in paths for observations in iter_raw_observations(path, chunksize)]
+    if not chunks:
+        columns = ['student_id', 'step'] + BEHAVIOR_COLS
+        return pd.DataFrame(columns=columns).astype({'student_id': 'category', 'step': 'int16',
+                                                      **{col: 'uint8' for col in BEHAVIOR_COLS}})
+    df = pd.concat(chunks, ignore_index=True)
+    df['student_id'] = df['student_id'].astype('category')
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert raw observation master sheets to the processed format")
+    parser.add_argument('sheets', nargs='+', type=Path, help="Raw master sheet CSV exports")
+    parser.add_argument('--out', required=True, type=Path, help="processed_observation_data.csv to write")
+    parser.add_argument('--chunksize', type=int, default=50_000, help="Rows read per chunk")
+    args = parser.parse_args(argv)
+
+    written = convert_raw_sheets(args.sheets, args.out, args.chunksize)
+    print(f"Wrote {written} step observations to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""On-disk, memory-mapped observation store for pooled datasets.
+
+A store is a directory holding one packed uint32 behavior bitmask per step
+(`masks.u32`, same bit layout as `BehaviorBitset`) with companion `codes.i32`
+(student code) and `steps.i16` arrays, plus `meta.json` with the behavior
+columns and the student IDs. That is 10 bytes per step instead of 19 int64
+flags and an object ID.
+
+Rows are stored sorted by (student, step), so every session is contiguous.
+The co-occurrence, usage, over/under and transition computations stream over
+the memory-mapped arrays in fixed-size chunks; peak memory depends on the
+chunk size and the number of students, not the number of rows. All results
+are integer counts summed across chunks, so they match the in-memory
+computations exactly. Like `AnalysisContext.student_data`, the computations
+cover every student except the master scan unless `students` says otherwise.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .bitset import BehaviorBitset
+from .columns import BEHAVIOR_COLS, MASTER_SCAN_ID
+from .comparison import compare_to_scans
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+_ARRAYS = {'masks': ('masks.u32', np.uint32), 'codes': ('codes.i32', np.int32), 'steps': ('steps.i16', np.int16)}
+
+
+def _sort_key(codes, steps):
+    return (codes.astype(np.int64) << 16) | (steps.astype(np.int64) + 32768)
+
+
+def build_mapped_store(csv_paths, store_dir, columns=BEHAVIOR_COLS, chunksize=DEFAULT_CHUNK_ROWS):
+    """Convert processed observation CSVs into a memory-mapped store, chunk by chunk.
+
+    If the rows do not arrive in (student, step) order they are sorted
+    afterwards, which needs 16 bytes of memory per row for the sort order.
+    """
+    columns = list(columns)
+    if len(columns) > 32:
+        raise ValueError(f"At most 32 behaviors fit in a uint32 mask, got {len(columns)}")
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    code_of = {}
+    in_order = True
+    last_key = None
+
+    files = {name: open(store_dir / filename, 'wb') for name, (filename, _) in _ARRAYS.items()}
+    try:
+        for csv_path in csv_paths:
+            dtypes = {col: 'uint8' for col in columns}
+            dtypes.update({'student_id': str, 'step': 'int16'})
+            for chunk in pd.read_csv(csv_path, dtype=dtypes, usecols=['student_id', 'step'] + columns,
+                                     chunksize=chunksize):
+                flags = chunk[columns].to_numpy(dtype=np.uint32)
+                masks = (flags << np.arange(len(columns), dtype=np.uint32)).sum(axis=1, dtype=np.uint32)
+                # Codes in order of first appearance, so contiguous sessions stay in code order
+                inverse, uniques = pd.factorize(chunk['student_id'])
+                lookup = np.array([code_of.setdefault(student_id, len(code_of)) for student_id in uniques],
+                                  dtype=np.int32)
+                codes = lookup[inverse]
+                steps = chunk['step'].to_numpy(dtype=np.int16)
+
+                key = _sort_key(codes, steps)
+                if len(key):
+                    in_order &= bool((np.diff(key) >= 0).all()) and (last_key is None or key[0] >= last_key)
+                    last_key = key[-1]
+
+                masks.tofile(files['masks'])
+                codes.tofile(files['codes'])
+                steps.tofile(files['steps'])
+    finally:
+        for f in files.values():
+            f.close()
+
+    meta = {'columns': columns, 'students': list(code_of)}
+    (store_dir / 'meta.json').write_text(json.dumps(meta))
+    store = MappedObservations(store_dir)
+    if not in_order:
+        store = store._sorted()
+    return store
+
+
+class MappedObservations:
+    """Read-only, memory-mapped view of a store written by `build_mapped_store`"""
+
+    def __init__(self, store_dir):
+        self.store_dir = Path(store_dir)
+        meta = json.loads((self.store_dir / 'meta.json').read_text())
+        self.columns = meta['columns']
+        self.students = np.array(meta['students'], dtype=object)
+        self._code_of = {student_id: code for code, student_id in enumerate(self.students)}
+        self._bit_index = {col: i for i, col in enumerate(self.columns)}
+        for name, (filename, dtype) in _ARRAYS.items():
+            path = self.store_dir / filename
+            array = np.memmap(path, dtype=dtype, mode='r') if path.stat().st_size else np.zeros(0, dtype)
+            setattr(self, name, array)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def _sorted(self):
+        """Rewrite the arrays in (student, step) order"""
+        order = np.argsort(_sort_key(self.codes, self.steps), kind='stable')
+        for name, (filename, dtype) in _ARRAYS.items():
+            source = getattr(self, name)
+            tmp_path = self.store_dir / (filename + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                for start in range(0, len(order), DEFAULT_CHUNK_ROWS):
+                    np.asarray(source[order[start:start + DEFAULT_CHUNK_ROWS]], dtype=dtype).tofile(f)
+            del source
+            setattr(self, name, None)
+            tmp_path.replace(self.store_dir / filename)
+        return MappedObservations(self.store_dir)
+
+    def _student_filter(self, students):
+        """Boolean lookup over student codes (None: every student but the master scan)"""
+        if students is None:
+            if MASTER_SCAN_ID not in self._code_of:
+                return None
+            keep = np.ones(len(self.students), dtype=bool)
+            keep[self._code_of[MASTER_SCAN_ID]] = False
+            return keep
+        keep = np.zeros(len(self.students), dtype=bool)
+        keep[[self._code_of[student_id] for student_id in students if student_id in self._code_of]] = True
+        return keep
+
+    def _shifts(self, cols):
+        return np.array([self._bit_index[col] for col in cols], dtype=np.uint32)
+
+    def iter_chunks(self, chunk_rows=DEFAULT_CHUNK_ROWS, students=None):
+        """Yield `BehaviorBitset`s over consecutive row ranges, only the rows of
+        `students` (default: every student but the master scan)"""
+        keep = self._student_filter(students)
+        for start in range(0, len(self), chunk_rows):
+            stop = min(start + chunk_rows, len(self))
+            codes = np.asarray(self.codes[start:stop])
+            rows = slice(None) if keep is None else keep[codes]
+            yield BehaviorBitset(np.asarray(self.masks[start:stop])[rows], codes[rows],
+                                 np.asarray(self.steps[start:stop])[rows], self.students, self.columns)
+
+    def cooccurrence_counts(self, row_cols, col_cols=None, students=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Same-step pair counts and row totals, as `cooccurrence.cooccurrence_counts`"""
+        col_cols = row_cols if col_cols is None else col_cols
+        pair_counts = np.zeros((len(row_cols), len(col_cols)), dtype=np.int64)
+        row_totals = np.zeros(len(row_cols), dtype=np.int64)
+        for bits in self.iter_chunks(chunk_rows, students):
+            x = bits.to_matrix(row_cols)
+            y = bits.to_matrix(col_cols)
+            pair_counts += x.T.astype(np.int64) @ y
+            row_totals += x.sum(axis=0, dtype=np.int64)
+        return pair_counts, row_totals
+
+    def student_usage(self, cols=None, students=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Student x behavior table of whether each student ever used each behavior"""
+        cols = self.columns if cols is None else list(cols)
+        union = np.zeros(len(self.students), dtype=np.uint32)
+        present = np.zeros(len(self.students), dtype=bool)
+        for bits in self.iter_chunks(chunk_rows, students):
+            np.bitwise_or.at(union, bits.student_codes, bits.masks)
+            present[bits.student_codes] = True
+        usage = ((union[present, None] >> self._shifts(cols)) & 1).astype(bool)
+        return pd.DataFrame(usage, index=pd.Index(self.students[present], name='student_id'), columns=cols)
+
+    def compare_to_scans(self, scan_ids, students=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Over/under comparison of `students` against the scans `scan_ids` (see `comparison.py`)"""
+        scans = self.student_usage(students=scan_ids, chunk_rows=chunk_rows)
+        scans = scans.reindex(pd.Index(list(scan_ids), name='scan_id'), fill_value=False)
+        return compare_to_scans(self.student_usage(students=students, chunk_rows=chunk_rows), scans)
+
+    def next_step_transitions(self, cols, students=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Step N -> N+1 counts, as `transitions.next_step_transitions`.
+
+        Each chunk also reads the first row of the next one, so pairs and
+        session ends that straddle a chunk boundary are counted once.
+        """
+        keep = self._student_filter(students)
+        shifts = self._shifts(cols)
+        pair_counts = np.zeros((len(cols), len(cols)), dtype=np.int64)
+        continuing_counts = np.zeros(len(cols), dtype=np.int64)
+        last_counts = np.zeros(len(cols), dtype=np.int64)
+
+        for start in range(0, len(self), chunk_rows):
+            stop = min(start + chunk_rows, len(self))
+            ahead = min(stop + 1, len(self))
+            codes = np.asarray(self.codes[start:ahead])
+            steps = np.asarray(self.steps[start:ahead]).astype(np.int64)
+            flags = ((np.asarray(self.masks[start:ahead])[:, None] >> shifts) & 1).astype(np.int64)
+
+            same_student = codes[1:] == codes[:-1]
+            consecutive = same_student & (steps[1:] == steps[:-1] + 1)
+            # Rows of this chunk whose session ends here (the store's last row always does)
+            is_last = ~same_student if ahead > stop else np.r_[~same_student, True]
+            if keep is not None:
+                wanted = keep[codes[:stop - start]]
+                consecutive &= wanted[:len(consecutive)]
+                is_last &= wanted
+
+            current = flags[:-1][consecutive]
+            pair_counts += current.T @ flags[1:][consecutive]
+            continuing_counts += current.sum(axis=0)
+            last_counts += flags[:stop - start][is_last].sum(axis=0)
+        return pair_counts, continuing_counts, last_counts
@@ -0,0 +1,480 @@
+"""Multivariate models of troubleshooting success from session behavior.
+
+`session_features` turns every session into one row of features, built from
+the step bitmasks (see `bitset.py`):
+- `uses: X`: the session used behavior X at some step
+- `X -> Y`: some step with X was directly followed by a step with Y
+- `first: X` / `last: X`: X was observed in the first / last step
+- `actions_per_step` and `steps`
+
+Only the 0/1 features used by at least `min_students` sessions (and not by all
+of them) are kept, so most of the K x K transition pairs drop out on real
+data. `model_success` fits one of two models to an outcome label:
+- 'logistic': L2-penalized logistic regression on standardized features
+  (Newton's method with a backtracking line search on the penalized log
+  loss), whose coefficients are log-odds per standard deviation
+- 'boosting': gradient-boosted decision stumps over quantile-binned features
+  (one histogram of gradients per round for all features at once)
+
+Both are scored with stratified k-fold cross-validation. Permutation
+importance (the drop in held-out AUC when one feature is shuffled) is measured
+on each held-out fold. Folds, and any bootstrap refits of the logistic
+effects (in chunks of `chunk_size` replicates), run on a process pool; each
+fold and chunk has its own seed spawned from `seed`, so results don't depend
+on the number of processes.
+
+    python -m troubleshooting_analysis.modeling processed_observation_data.csv \
+        --outcomes outcomes.csv --model boosting --out success_model
+"""
+
+import argparse
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .bitset import popcount
+from .columns import ACTION_COLS, MASTER_SCAN_ID
+from .sessions import SessionIndex
+from .tracing import traced
+from .transitions import step_links
+
+
+def _unpack(masks, n_bits):
+    """(..., n_bits) 0/1 array of the bits of each uint32 mask"""
+    return (masks[..., None] >> np.arange(n_bits, dtype=np.uint32)) & 1
+
+
+@traced()
+def session_features(data, columns=ACTION_COLS, min_students=5):
+    """Session x feature table (indexed by student_id, see module docstring)"""
+    columns = list(columns)
+    k = len(columns)
+    index = SessionIndex.from_frame(data[data['student_id'] != MASTER_SCAN_ID], columns)
+    bits, starts = index.bits, index.starts
+    if len(bits) == 0:
+        return pd.DataFrame(index=pd.Index([], name='student_id'))
+
+    steps = index.lengths
+    union = np.bitwise_or.reduceat(bits.masks, starts)
+    actions = np.add.reduceat(popcount(bits.masks), starts)
+
+    # For each session and behavior X, the OR of the masks of the steps right after a step with X
+    later = step_links(bits, 1)
+    has_later = later >= 0
+    following = np.where(_unpack(bits.masks[has_later], k).astype(bool),
+                         bits.masks[later[has_later]][:, None], np.uint32(0))
+    session = index.session_of_row()[has_later]
+    next_masks = np.zeros((len(starts), k), dtype=np.uint32)
+    if len(session):
+        pair_starts = np.flatnonzero(np.r_[True, session[1:] != session[:-1]])
+        next_masks[session[pair_starts]] = np.bitwise_or.reduceat(following, pair_starts, axis=0)
+
+    names = ([f'uses: {col}' for col in columns]
+             + [f'{a} -> {b}' for a in columns for b in columns]
+             + [f'first: {col}' for col in columns]
+             + [f'last: {col}' for col in columns])
+    flags = np.hstack([
+        _unpack(union, k),
+        _unpack(next_masks, k).reshape(len(starts), k * k),
+        _unpack(bits.masks[index.first_rows()], k),
+        _unpack(bits.masks[index.last_rows()], k),
+    ])
+    support = flags.sum(axis=0)
+    keep = (support >= min_students) & (support < len(starts))
+
+    features = pd.DataFrame(flags[:, keep].astype(np.float64), columns=np.array(names)[keep],
+                            index=pd.Index(index.students, name='student_id'))
+    features['actions_per_step'] = actions / steps
+    features['steps'] = steps.astype(np.float64)
+    return features
+
+
+def _sigmoid(z):
+    return 1 / (1 + np.exp(-np.clip(z, -35, 35)))
+
+
+class LogisticModel:
+    """L2-penalized logistic regression on standardized features (Newton's method).
+
+    Minimizes the (optionally weighted) summed log loss plus `alpha` / 2 *
+    ||coef||^2; the intercept is not penalized. Each Newton step is halved
+    until it decreases that objective, so a warm start far from the optimum
+    still converges. `coef_` is in log-odds per standard deviation of each
+    feature; `converged_` is False (with a RuntimeWarning) when `max_iter` ran
+    out before a full Newton step fell below `tol`.
+    """
+
+    def __init__(self, alpha=1.0, max_iter=50, tol=1e-8):
+        self.alpha = alpha
+        self.max_iter = max_iter
+        self.tol = tol
+
+    def standardize(self, X):
+        """X standardized with the fitted means and scales, with a leading column of ones"""
+        return np.hstack([np.ones((len(X), 1)), (X - self.mean_) / self.scale_])
+
+    def fit(self, X, y, sample_weight=None, start=None, standardized=None):
+        """Fit to X, y. `start` (a fitted model) warm-starts Newton's method;
+        `standardized` reuses `start.standardize(X)` and its scaling"""
+        if standardized is None:
+            self.mean_ = X.mean(axis=0)
+            scale = X.std(axis=0)
+            self.scale_ = np.where(scale > 0, scale, 1.0)
+            Z = self.standardize(X)
+        else:
+            self.mean_, self.scale_, Z = start.mean_, start.scale_, standardized
+        weight = np.ones(len(Z)) if sample_weight is None else sample_weight
+        penalty = np.full(Z.shape[1], self.alpha)
+        penalty[0] = 0.0
+
+        def objective(beta):
+            z = Z @ beta
+            return weight @ (np.logaddexp(0, z) - y * z) + penalty @ beta ** 2 / 2
+
+        beta = np.zeros(Z.shape[1]) if start is None else np.r_[start.intercept_, start.coef_]
+        loss = objective(beta)
+        self.converged_ = False
+        for _ in range(self.max_iter):
+            p = _sigmoid(Z @ beta)
+            gradient = Z.T @ (weight * (p - y)) + penalty * beta
+            hessian = (Z.T * (weight * p * (1 - p))) @ Z
+            hessian[np.diag_indices_from(hessian)] += penalty + 1e-9
+            step = np.linalg.solve(hessian, gradient)
+            decrement = gradient @ step
+            # Backtracking (Armijo) line search on the penalized log loss; close to
+            # the optimum the full step is taken (the decrease is below rounding there)
+            t = 1.0
+            trial = objective(beta - step)
+            while decrement > 1e-10 and trial > loss - 1e-4 * t * decrement and t > 1e-10:
+                t /= 2
+                trial = objective(beta - t * step)
+            beta, loss = beta - t * step, trial
+            if t == 1.0 and np.abs(step).max() < self.tol:
+                self.converged_ = True
+                break
+        if not self.converged_:
+            warnings.warn(f"LogisticModel did not converge in {self.max_iter} Newton iterations", RuntimeWarning)
+        self.intercept_, self.coef_ = beta[0], beta[1:]
+        return self
+
+    def decision_function(self, X):
+        return self.intercept_ + ((X - self.mean_) / self.scale_) @ self.coef_
+
+    def rescore(self, X, score, feature, values):
+        """`decision_function` after replacing column `feature` of X with
+        `values` (..., rows), given `score` = decision_function(X)"""
+        return score + self.coef_[feature] / self.scale_[feature] * (values - X[:, feature])
+
+    def predict_proba(self, X):
+        """P(positive outcome) for each row of X"""
+        return _sigmoid(self.decision_function(X))
+
+
+class BoostedStumps:
+    """Gradient-boosted depth-1 trees for the log loss.
+
+    Features are cut at up to `n_bins - 1` quantiles. Every round sums the
+    gradients and hessians of all features' bins with one bincount, picks the
+    split with the largest gain (second-order, `l2`-regularized leaf values)
+    and adds it, shrunk by `learning_rate`.
+    """
+
+    def __init__(self, n_rounds=100, learning_rate=0.1, n_bins=16, l2=1.0, min_hessian=1.0):
+        self.n_rounds = n_rounds
+        self.learning_rate = learning_rate
+        self.n_bins = n_bins
+        self.l2 = l2
+        self.min_hessian = min_hessian
+
+    def _edges(self, X):
+        """(features x n_bins - 1) cut points, padded with +inf"""
+        levels = np.linspace(0, 1, self.n_bins + 1)[1:-1]
+        edges = np.full((X.shape[1], self.n_bins - 1), np.inf)
+        for j, column in enumerate(X.T):
+            cuts = np.unique(np.quantile(column, levels))
+            cuts = cuts[cuts > column.min()]
+            edges[j, :len(cuts)] = cuts
+        return edges
+
+    def fit(self, X, y):
+        n, n_features = X.shape
+        edges = self._edges(X)
+        # Bin b holds edges[b - 1] <= x < edges[b]
+        binned = np.stack([np.searchsorted(edges[j], X[:, j], side='right') for j in range(n_features)], axis=1)
+        flat = (binned + np.arange(n_features) * self.n_bins).ravel()
+
+        prior = np.clip(y.mean(), 1e-6, 1 - 1e-6)
+        self.base_ = np.log(prior / (1 - prior))
+        score = np.full(n, self.base_)
+        self.stumps_ = []
+        for _ in range(self.n_rounds):
+            p = _sigmoid(score)
+            g, h = p - y, p * (1 - p)
+            size = n_features * self.n_bins
+            grad = np.bincount(flat, np.repeat(g, n_features), minlength=size).reshape(n_features, -1)
+            hess = np.bincount(flat, np.repeat(h, n_features), minlength=size).reshape(n_features, -1)
+            # Left side of the split after bin b: bins 0..b
+            left_g, left_h = np.cumsum(grad, axis=1)[:, :-1], np.cumsum(hess, axis=1)[:, :-1]
+            total_g, total_h = g.sum(), h.sum()
+            right_g, right_h = total_g - left_g, total_h - left_h
+            gain = (left_g ** 2 / (left_h + self.l2) + right_g ** 2 / (right_h + self.l2)
+                    - total_g ** 2 / (total_h + self.l2))
+            gain[(left_h < self.min_hessian) | (right_h < self.min_hessian) | np.isinf(edges)] = -np.inf
+            feature, cut = np.unravel_index(np.argmax(gain), gain.shape)
+            if not gain[feature, cut] > 0:
+                break
+            left = -left_g[feature, cut] / (left_h[feature, cut] + self.l2) * self.learning_rate
+            right = -right_g[feature, cut] / (right_h[feature, cut] + self.l2) * self.learning_rate
+            threshold = edges[feature, cut]
+            score += np.where(X[:, feature] < threshold, left, right)
+            self.stumps_.append((feature, threshold, left, right))
+        return self
+
+    def decision_function(self, X):
+        score = np.full(len(X), self.base_)
+        for feature, threshold, left, right in self.stumps_:
+            score += np.where(X[:, feature] < threshold, left, right)
+        return score
+
+    def rescore(self, X, score, feature, values):
+        """`decision_function` after replacing column `feature` of X with
+        `values` (..., rows), given `score` = decision_function(X)"""
+        score = score + np.zeros_like(values, dtype=np.float64)
+        for split, threshold, left, right in self.stumps_:
+            if split == feature:
+                score += np.where(values < threshold, left, right) - np.where(X[:, feature] < threshold, left, right)
+        return score
+
+    def predict_proba(self, X):
+        """P(positive outcome) for each row of X"""
+        return _sigmoid(self.decision_function(X))
+
+
+MODELS = {'logistic': LogisticModel, 'boosting': BoostedStumps}
+
+
+def _average_ranks(scores):
+    """1-based ranks of `scores`, tied values sharing their average rank"""
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    return (np.cumsum(counts) - (counts - 1) / 2)[inverse]
+
+
+def roc_auc(y, scores):
+    """Area under the ROC curve (rank statistic, ties count half); NaN with one class.
+    With 2-D `scores`, one AUC per row"""
+    y = np.asarray(y, dtype=bool)
+    n_pos, n_neg = y.sum(), (~y).sum()
+    scores = np.asarray(scores)
+    if n_pos == 0 or n_neg == 0:
+        return np.full(scores.shape[:-1], np.nan) if scores.ndim > 1 else np.nan
+    if scores.ndim > 1:
+        return np.array([roc_auc(y, row) for row in scores])
+    ranks = _average_ranks(scores)
+    return (ranks[y].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+
+
+def log_loss(y, p):
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def stratified_folds(y, folds, seed=0):
+    """Fold number of each row, with each class spread evenly over the folds"""
+    rng = np.random.default_rng(seed)
+    assignment = np.empty(len(y), dtype=np.int64)
+    offset = 0
+    for label in np.unique(y):
+        rows = rng.permutation(np.flatnonzero(y == label))
+        assignment[rows] = (np.arange(len(rows)) + offset) % folds
+        offset += len(rows)
+    return assignment
+
+
+def _fold_task(task):
+    X, y, train, test, model, params, n_repeats, seed = task
+    rng = np.random.default_rng(seed)
+    fitted = MODELS[model](**params).fit(X[train], y[train])
+    X_test, y_test = X[test], y[test]
+    score = fitted.decision_function(X_test)
+    predicted = _sigmoid(score)
+    auc = roc_auc(y_test, score)
+
+    # Held-out AUC drop with one feature shuffled; only that feature's part of the score changes
+    drops = np.zeros((X.shape[1], n_repeats))
+    for j in range(X.shape[1]):
+        if np.ptp(X_test[:, j]) == 0:
+            continue
+        shuffled = rng.permuted(np.broadcast_to(X_test[:, j], (n_repeats, len(test))), axis=1)
+        drops[j] = auc - roc_auc(y_test, fitted.rescore(X_test, score, j, shuffled))
+    scores = {'auc': auc, 'accuracy': float(np.mean((predicted >= 0.5) == y_test)),
+              'log_loss': log_loss(y_test, predicted), 'train': len(train), 'test': len(test)}
+    return predicted, scores, drops
+
+
+def _bootstrap_task(task):
+    X, y, params, start, n_replicates, seed = task
+    rng = np.random.default_rng(seed)
+    # Resampling sessions with replacement = multinomial weights on the full sample,
+    # which keeps its standardization and lets every (line-searched) refit start from its fit
+    Z = start.standardize(X)
+    weights = rng.multinomial(len(y), np.full(len(y), 1 / len(y)), size=n_replicates).astype(np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # counted by the caller
+        fits = [LogisticModel(**params).fit(X, y, weight, start=start, standardized=Z) for weight in weights]
+    return np.stack([fit.coef_ for fit in fits]), np.array([fit.converged_ for fit in fits])
+
+
+def _run_tasks(func, tasks, processes):
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1:
+        return [func(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(processes, len(tasks))) as pool:
+        return list(pool.map(func, tasks))
+
+
+@dataclass
+class SuccessModel:
+    """Cross-validated model of an outcome from session features
+
+    `scores` has the held-out AUC, accuracy and log loss of each fold and
+    `predictions` the held-out P(success) of every session. `importance` is
+    the mean (and std across folds) drop in held-out AUC when a feature is
+    shuffled. `effects` comes from an L2-penalized logistic fit on all
+    sessions whatever `model` was cross-validated: `coef` is the log-odds
+    change per standard deviation of the feature given all the others,
+    `odds_ratio` its exponential with bootstrap bounds (NaN without
+    bootstrap), and `mean_success` / `mean_failure` are the feature's mean in
+    each class (usage rates for the 0/1 features).
+    """
+    model: str
+    features: pd.DataFrame
+    target: pd.Series
+    scores: pd.DataFrame
+    predictions: pd.Series
+    importance: pd.DataFrame
+    effects: pd.DataFrame
+
+    @property
+    def auc(self):
+        return float(self.scores['auc'].mean())
+
+
+@traced()
+def model_success(data, outcomes, outcome='success', positive='Y', model='logistic', columns=ACTION_COLS,
+                  folds=5, n_repeats=5, n_bootstrap=0, confidence=0.95, min_students=5, seed=0,
+                  processes=None, alpha=1.0, chunk_size=25, **params):
+    """Fit and cross-validate a model of `outcome` from each session's features.
+
+    `outcomes` is a label table indexed by student_id (see
+    `outcomes.read_outcomes`); sessions whose `outcome` equals `positive` are
+    the successes, other labelled sessions the failures and unlabelled ones
+    are left out. `params` go to the model (see `MODELS`); `alpha` is the L2
+    penalty of the logistic effects (and of the cross-validated model when it
+    is 'logistic'). `folds` is capped at the size of the rarer outcome, which
+    needs at least 2 sessions. Bootstrap replicates are drawn `chunk_size` at
+    a time; refits that do not converge are left out of the bounds (with a
+    RuntimeWarning).
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}, expected one of {', '.join(MODELS)}")
+    if folds < 2:
+        raise ValueError(f"folds must be at least 2, got {folds}")
+    features = session_features(data, columns, min_students)
+    labels = outcomes[outcome].reindex(features.index)
+    labelled = labels.notna().to_numpy()
+    features = features[labelled]
+    target = pd.Series((labels[labelled] == positive).astype(np.int64), index=features.index, name=outcome)
+    X, y = features.to_numpy(), target.to_numpy().astype(np.float64)
+    if len(np.unique(y)) < 2:
+        raise ValueError(f"Need both outcomes to model {outcome!r}, got {len(y)} sessions of one class")
+    if model == 'logistic':
+        params = {'alpha': alpha, **params}
+
+    minority = int(np.bincount(y.astype(np.int64)).min())
+    if minority < 2:
+        raise ValueError(f"Need at least 2 sessions of each outcome to cross-validate {outcome!r}, "
+                         f"got {minority} of the rarer one")
+    folds = min(folds, minority)
+    assignment = stratified_folds(y, folds, seed)
+    chunk_starts = np.arange(0, max(n_bootstrap, 0), chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(folds + len(chunk_starts))
+    results = _run_tasks(_fold_task, [
+        (X, y, np.flatnonzero(assignment != fold), np.flatnonzero(assignment == fold), model, params,
+         n_repeats, seeds[fold])
+        for fold in range(folds)], processes)
+
+    predictions = np.empty(len(y))
+    for fold, (predicted, _, _) in enumerate(results):
+        predictions[assignment == fold] = predicted
+    scores = pd.DataFrame([scores for _, scores, _ in results], index=pd.RangeIndex(folds, name='fold'))
+    fold_drops = np.stack([drops.mean(axis=1) for _, _, drops in results])
+    importance = pd.DataFrame({'mean': fold_drops.mean(axis=0), 'std': fold_drops.std(axis=0)},
+                              index=features.columns).sort_values('mean', ascending=False)
+
+    full = LogisticModel(alpha=alpha).fit(X, y)
+    lower = upper = np.full(X.shape[1], np.nan)
+    if n_bootstrap > 0:
+        chunks = _run_tasks(_bootstrap_task, [
+            (X, y, {'alpha': alpha}, full, min(chunk_size, n_bootstrap - first), seeds[folds + k])
+            for k, first in enumerate(chunk_starts)], processes)
+        coefs = np.concatenate([chunk_coefs for chunk_coefs, _ in chunks])
+        converged = np.concatenate([chunk_converged for _, chunk_converged in chunks])
+        if not converged.all():
+            warnings.warn(f"{(~converged).sum()} of {n_bootstrap} bootstrap refits did not converge "
+                          f"and are left out of the bounds", RuntimeWarning)
+            coefs = coefs[converged]
+        if len(coefs):
+            tail = (1 - confidence) / 2 * 100
+            lower, upper = np.exp(np.percentile(coefs, [tail, 100 - tail], axis=0))
+    effects = pd.DataFrame({
+        'coef': full.coef_,
+        'odds_ratio': np.exp(full.coef_),
+        'lower': lower,
+        'upper': upper,
+        'mean_success': X[y == 1].mean(axis=0),
+        'mean_failure': X[y == 0].mean(axis=0),
+    }, index=features.columns)
+    effects = effects.loc[importance.index]
+    return SuccessModel(model, features, target, scores, pd.Series(predictions, index=features.index),
+                        importance, effects)
+
+
+def main(argv=None):
+    from .outcomes import read_outcomes
+    from .store import load_observations
+
+    parser = argparse.ArgumentParser(description="Cross-validated model of troubleshooting success")
+    parser.add_argument('data', type=Path, help="processed_observation_data.csv")
+    parser.add_argument('--outcomes', type=Path, required=True, help="CSV with student_id and outcome columns")
+    parser.add_argument('--outcome', default='success', help="Outcome column (default: success)")
+    parser.add_argument('--positive', default='Y', help="Outcome value counted as success (default: Y)")
+    parser.add_argument('--model', choices=sorted(MODELS), default='logistic')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=5, help="Shuffles per feature for permutation importance")
+    parser.add_argument('--bootstrap', type=int, default=0, help="Bootstrap refits for the odds ratio bounds")
+    parser.add_argument('--processes', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', type=Path, required=True, help="Directory for the result tables")
+    args = parser.parse_args(argv)
+
+    result = model_success(load_observations(args.data), read_outcomes(args.outcomes), args.outcome,
+                           args.positive, args.model, folds=args.folds, n_repeats=args.repeats,
+                           n_bootstrap=args.bootstrap, seed=args.seed, processes=args.processes)
+    args.out.mkdir(parents=True, exist_ok=True)
+    result.scores.to_csv(args.out / 'model_scores.csv')
+    result.importance.to_csv(args.out / 'model_importance.csv')
+    result.effects.to_csv(args.out / 'model_effects.csv')
+    result.predictions.rename('p_success').to_csv(args.out / 'model_predictions.csv')
+
+    print(f"{args.model}: {len(result.target)} sessions, {result.features.shape[1]} features, "
+          f"held-out AUC {result.auc:.3f} (+/- {result.scores['auc'].std():.3f})")
+    print(result.effects.head(15).round(3).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Session metrics stratified by troubleshooting outcome.
+
+Outcome labels (e.g. whether the troubleshooter fixed the circuit, and which
+circuit they worked on) come in a separate table keyed by `student_id`, one
+row per session. Every session is labelled with its stratum, the combination
+of its values in the chosen outcome columns, so any number of strata works
+(success/fail, circuit A/B x success/fail, ...) without a new script.
+
+The per-step behavior counts are popcounts of the step bitmasks (see
+`bitset.py`). Steps and behaviors are summed per session with one bincount
+over the student codes. Per-stratum totals are one more bincount over the
+sessions' stratum codes, and behavior prevalence is one product of the
+session x stratum indicator matrix with the session x behavior usage matrix.
+
+    python -m troubleshooting_analysis.outcomes processed_observation_data.csv \
+        --outcomes outcomes.csv --strata circuit success --out outcome_metrics
+"""
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .bitset import BehaviorBitset, popcount
+from .columns import ACTION_COLS, MASTER_SCAN_ID
+from .tracing import traced
+
+
+def read_outcomes(path, strata=None):
+    """Outcome label table indexed by `student_id` (all columns, or just `strata`).
+
+    Labels are read as text so 'Y'/'N', circuit names and numeric codes all
+    form strata the same way; blank cells are missing labels.
+    """
+    outcomes = pd.read_csv(path, dtype=str, skipinitialspace=True).set_index('student_id')
+    outcomes = outcomes.apply(lambda col: col.str.strip()).replace('', np.nan)
+    return outcomes if strata is None else outcomes[list(strata)]
+
+
+@dataclass
+class OutcomeMetrics:
+    """Session metrics grouped by outcome stratum
+
+    `sessions` has one row per labelled session: its stratum values, step
+    count, behavior count and behaviors per step. `summary` and `prevalence`
+    are indexed by stratum (a MultiIndex for several outcome columns).
+    `summary.behaviors_per_step` pools every step of the stratum (total
+    behaviors / total steps); `mean_behaviors_per_step` averages the
+    sessions' own rates. `prevalence` is the % of the stratum's sessions that
+    used each behavior. `unlabeled` lists the sessions left out for lack of a
+    complete label.
+    """
+    strata: list
+    sessions: pd.DataFrame
+    summary: pd.DataFrame
+    prevalence: pd.DataFrame
+    unlabeled: list
+
+    def distribution(self, metric='behaviors_per_step'):
+        """Per-stratum distribution (count, mean, std, quartiles) of a session metric"""
+        return self.sessions.groupby(self.strata)[metric].describe()
+
+
+@traced()
+def outcome_metrics(data, outcomes, strata, columns=ACTION_COLS):
+    """Compare sessions across outcome strata.
+
+    `data` holds step observations (student_id, step and 0/1 flags for
+    `columns`), and `outcomes` is a label table indexed by student_id (see
+    `read_outcomes`). Sessions are grouped by the values in the `strata`
+    columns of `outcomes`.
+    """
+    strata = [strata] if isinstance(strata, str) else list(strata)
+    data = data[data['student_id'] != MASTER_SCAN_ID]
+    bits = BehaviorBitset.from_frame(data, columns)
+
+    # Per session: steps, behaviors (popcount of each step's mask) and the OR of its masks
+    n_students = len(bits.students)
+    steps = np.bincount(bits.student_codes, minlength=n_students)
+    behaviors = np.bincount(bits.student_codes, weights=popcount(bits.masks), minlength=n_students)
+    session_ids, union = bits.student_union()
+    observed = steps > 0
+    sessions = pd.DataFrame({
+        'steps': steps[observed],
+        'behaviors': behaviors[observed].astype(np.int64),
+    }, index=pd.Index(session_ids, name='student_id'))
+    sessions['behaviors_per_step'] = sessions['behaviors'] / sessions['steps']
+
+    labels = outcomes[strata].reindex(sessions.index)
+    labelled = labels.notna().all(axis=1).to_numpy()
+    unlabeled = list(sessions.index[~labelled])
+    sessions = pd.concat([labels[labelled], sessions[labelled]], axis=1)
+    usage = ((union[labelled, None] >> np.arange(len(columns), dtype=np.uint32)) & 1).astype(np.int64)
+
+    # Stratum code of every labelled session, then one aggregation per quantity
+    stratum_index = pd.MultiIndex.from_frame(sessions[strata])
+    codes, keys = pd.factorize(stratum_index, sort=True)
+    keys = keys.set_names(strata)
+    if len(strata) == 1:
+        keys = keys.get_level_values(0)
+    n_strata = len(keys)
+    session_counts = np.bincount(codes, minlength=n_strata)
+    step_totals = np.bincount(codes, weights=sessions['steps'], minlength=n_strata)
+    behavior_totals = np.bincount(codes, weights=sessions['behaviors'], minlength=n_strata)
+    indicator = np.zeros((n_strata, len(codes)), dtype=np.int64)
+    indicator[codes, np.arange(len(codes))] = 1
+
+    grouped = sessions.groupby(codes)
+    summary = pd.DataFrame({
+        'sessions': session_counts,
+        'share': session_counts / max(len(codes), 1) * 100,
+        'steps': step_totals.astype(np.int64),
+        'behaviors_per_step': behavior_totals / step_totals,
+        'mean_behaviors_per_step': grouped['behaviors_per_step'].mean().to_numpy(),
+        'mean_steps_per_session': step_totals / session_counts,
+        'median_steps_per_session': grouped['steps'].median().to_numpy(),
+    }, index=keys)
+    prevalence = pd.DataFrame(indicator @ usage / session_counts[:, None] * 100, index=keys, columns=list(columns))
+    return OutcomeMetrics(strata, sessions, summary, prevalence, unlabeled)
+
+
+def main(argv=None):
+    from .store import load_observations
+
+    parser = argparse.ArgumentParser(description="Session metrics stratified by outcome labels")
+    parser.add_argument('data', type=Path, help="processed_observation_data.csv")
+    parser.add_argument('--outcomes', type=Path, required=True, help="CSV with student_id and outcome columns")
+    parser.add_argument('--strata', nargs='+', required=True, help="Outcome columns that define the strata")
+    parser.add_argument('--out', type=Path, required=True, help="Directory for the metric tables")
+    args = parser.parse_args(argv)
+
+    metrics = outcome_metrics(load_observations(args.data), read_outcomes(args.outcomes), args.strata)
+    args.out.mkdir(parents=True, exist_ok=True)
+    metrics.sessions.to_csv(args.out / 'outcome_sessions.csv')
+    metrics.summary.to_csv(args.out / 'outcome_summary.csv')
+    metrics.prevalence.to_csv(args.out / 'outcome_prevalence.csv')
+    metrics.distribution().to_csv(args.out / 'outcome_behaviors_per_step.csv')
+    metrics.distribution('steps').to_csv(args.out / 'outcome_steps_per_session.csv')
+
+    print(metrics.summary.round(2).to_string())
+    if metrics.unlabeled:
+        print(f"{len(metrics.unlabeled)} sessions without a complete outcome label were left out")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Registry of analysis scripts.
+
+Each analysis script (`code.py`) registers a `run(ctx, output_path)` function
+with `@register_analysis`; `discover_analyses` imports the scripts so they
+register themselves. `run` may return a list of figure jobs (see `render.py`)
+for the caller to render, or draw and save its own figures and return None.
+"""
+
+import importlib.util
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ANALYSIS_DIRS = ['Phase_1', 'Phase_2', 'Additional_Analyses']
+
+# name -> (run function, output subdirectory)
+ANALYSES = {}
+
+
+def register_analysis(name, output_dir, inputs=(), settings=()):
+    """Register an analysis `run(ctx, output_path)` under `name`.
+
+    `inputs` names settings (see `config.py`) holding files the analysis reads
+    besides the observation data, so cached results follow their contents too;
+    `settings` names the other settings it reads, whose values are part of the
+    cache key as well.
+    """
+    def decorator(func):
+        func.inputs = tuple(inputs)
+        func.settings = tuple(settings)
+        ANALYSES[name] = (func, output_dir)
+        return func
+    return decorator
+
+
+def discover_analyses(root=REPO_ROOT):
+    """Import every analysis script under the phase directories so they register"""
+    for top in ANALYSIS_DIRS:
+        for script in sorted((Path(root) / top).glob('**/code.py')):
+            rel = script.parent.relative_to(root)
+            module_name = 'analysis_' + '_'.join(rel.parts)
+            spec = importlib.util.spec_from_file_location(module_name, script)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+    return ANALYSES
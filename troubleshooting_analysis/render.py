@@ -0,0 +1,328 @@
+"""Figure rendering, kept separate from the analysis computations.
+
+Analyses describe their heatmaps as `HeatmapJob`s (matrix, labels, titles,
+output file). `render_jobs` renders a batch of jobs on a process pool using the
+non-interactive Agg backend, so a batch regeneration never blocks on `show()`
+and 300-dpi figures are rendered on every core.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from matplotlib.artist import Artist, allow_rasterization
+from matplotlib.text import Text
+from matplotlib.transforms import IdentityTransform
+
+from . import tracing
+from .tracing import span
+
+
+@dataclass
+class HeatmapJob:
+    """Everything needed to draw and save one percentage heatmap"""
+    matrix: np.ndarray
+    output_file: Path
+    xlabels: list
+    ylabels: list
+    title: str
+    xlabel: str
+    ylabel: str
+    figsize: tuple = (14, 12)
+    cmap: str = 'YlOrRd'
+    vmin: float = 0
+    vmax: float = 100
+    colorbar_label: str = 'Co-occurrence Percentage'
+    dpi: int = 300
+    # Optional boolean mask of cells to star (e.g. significant in a permutation test)
+    significant: np.ndarray = None
+    # 'matplotlib', or 'pillow' for the fast raster-only PNG (see `draw_heatmap_image`)
+    renderer: str = 'matplotlib'
+
+
+def _cell_labels(job):
+    """Percentage label and text color of every cell"""
+    labels = np.char.mod('%.0f%%', job.matrix)
+    if job.significant is not None:
+        labels = np.char.add(labels, np.where(job.significant, '*', ''))
+    return labels, np.where(job.matrix < 50, 'black', 'white')
+
+
+class CellLabels(Artist):
+    """The text labels of every cell of a heatmap, drawn as one artist.
+
+    Cell (i, j) is labelled at data coordinates (j + offset, i + offset);
+    empty labels are skipped. On the Agg backend each distinct (label, color)
+    is laid out and rasterized once by a `Text` with `text_kwargs` and that
+    bitmap is stamped into every cell showing it, instead of laying out and
+    rasterizing one text artist per cell. Stamps land on whole pixels, so a
+    label can sit up to half a pixel from where a text artist would put it.
+    Other backends (PDF, SVG) get real text from a single reused `Text`.
+    """
+
+    zorder = 3
+
+    def __init__(self, labels, colors, offset=0.0, **text_kwargs):
+        super().__init__()
+        self.labels = np.asarray(labels, dtype=str)
+        self.colors = np.broadcast_to(np.asarray(colors, dtype=object), self.labels.shape)
+        self.offset = offset
+        self._text = Text(ha='center', va='center', **text_kwargs)
+        self._text.set_transform(IdentityTransform())
+        self._stamps = {}
+        # Labels sit inside their cells, so they never change the figure layout
+        self.set_in_layout(False)
+
+    def _stamp(self, label, color, renderer):
+        """RGBA bitmap of one label and the pixel of its anchor point"""
+        from matplotlib.backends.backend_agg import RendererAgg
+
+        key = (label, color, renderer.dpi)
+        if key not in self._stamps:
+            text = self._text
+            text.set_text(label)
+            text.set_color(color)
+            text.set_position((0, 0))
+            extent = text.get_window_extent(renderer)
+            anchor_x, anchor_y = 2 - math.floor(extent.x0), 2 - math.floor(extent.y0)
+            stamp_renderer = RendererAgg(math.ceil(extent.x1) + anchor_x + 2,
+                                         math.ceil(extent.y1) + anchor_y + 2, renderer.dpi)
+            text.set_position((anchor_x, anchor_y))
+            text.draw(stamp_renderer)
+            # draw_image takes rows bottom-up; the canvas buffer is top-down
+            stamp = np.ascontiguousarray(np.asarray(stamp_renderer.buffer_rgba())[::-1])
+            self._stamps[key] = (stamp, anchor_x, anchor_y)
+        return self._stamps[key]
+
+    @allow_rasterization
+    def draw(self, renderer):
+        from matplotlib.backends.backend_agg import RendererAgg
+
+        if not self.get_visible():
+            return
+        rows, cols = np.nonzero(self.labels != '')
+        centers = self.axes.transData.transform(np.column_stack([cols, rows]) + self.offset)
+        self._text.set_figure(self.get_figure(root=True))
+
+        if not isinstance(renderer, RendererAgg):
+            for (x, y), row, col in zip(centers, rows, cols):
+                self._text.set_text(self.labels[row, col])
+                self._text.set_color(self.colors[row, col])
+                self._text.set_position((x, y))
+                self._text.draw(renderer)
+            return
+
+        gc = renderer.new_gc()
+        for (x, y), row, col in zip(centers, rows, cols):
+            stamp, anchor_x, anchor_y = self._stamp(self.labels[row, col], self.colors[row, col], renderer)
+            renderer.draw_image(gc, round(x) - anchor_x, round(y) - anchor_y, stamp)
+        gc.restore()
+
+
+def annotate_cells(ax, labels, colors, offset=0.0, **text_kwargs):
+    """Label the cells of a heatmap drawn on `ax` (see `CellLabels`)"""
+    cell_labels = CellLabels(labels, colors, offset, **text_kwargs)
+    ax.add_artist(cell_labels)
+    return cell_labels
+
+
+def draw_heatmap(job):
+    """Draw `job` onto a new figure and return the figure"""
+    import matplotlib.pyplot as plt
+
+    plt.style.use('seaborn-v0_8-white')
+    plt.rcParams['font.family'] = 'Arial'
+    plt.rcParams['font.size'] = 10
+
+    fig, ax = plt.subplots(figsize=job.figsize)
+    matrix = job.matrix
+
+    # Create heatmap
+    im = ax.imshow(matrix, cmap=job.cmap, aspect='auto', vmin=job.vmin, vmax=job.vmax)
+
+    # Set ticks and labels
+    ax.set_xticks(range(matrix.shape[1]))
+    ax.set_yticks(range(matrix.shape[0]))
+    ax.set_xticklabels(job.xlabels, rotation=45, ha='right', fontsize=9)
+    ax.set_yticklabels(job.ylabels, fontsize=9)
+
+    # Add percentage text to each cell
+    labels, colors = _cell_labels(job)
+    annotate_cells(ax, labels, colors, fontsize=8, fontweight='bold')
+
+    # Add colorbar
+    cbar = plt.colorbar(im, ax=ax, shrink=0.6)
+    cbar.set_label(job.colorbar_label, rotation=270, labelpad=20, fontsize=12)
+
+    # Set title and labels
+    ax.set_title(job.title, fontsize=14, fontweight='bold', pad=20)
+    ax.set_xlabel(job.xlabel, fontsize=12, fontweight='bold')
+    ax.set_ylabel(job.ylabel, fontsize=12, fontweight='bold')
+
+    plt.tight_layout()
+    return fig
+
+
+def _font(size_px, bold=False):
+    from matplotlib.font_manager import FontProperties, findfont
+    from PIL import ImageFont
+
+    path = findfont(FontProperties(family='DejaVu Sans', weight='bold' if bold else 'normal'))
+    return ImageFont.truetype(path, max(1, round(size_px)))
+
+
+def _text_image(text, font, angle=0):
+    """Grayscale coverage mask of `text`, rotated counter-clockwise by `angle`"""
+    from PIL import Image, ImageDraw
+
+    left, top, right, bottom = font.getbbox(text)
+    mask = Image.new('L', (max(1, right - left), max(1, bottom - top)))
+    ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font)
+    return mask.rotate(angle, expand=True, resample=Image.BICUBIC) if angle else mask
+
+
+def draw_heatmap_image(job):
+    """Draw `job` straight into a Pillow RGB image, without matplotlib figures.
+
+    The cells are the colormapped matrix scaled up block-wise and the labels
+    are drawn with Pillow, so there is no figure layout and nothing is vector
+    drawn. Fonts and sizes follow `draw_heatmap` (in points at `job.dpi`), but
+    the layout is simpler: it is meant for bulk figure generation (e.g. one
+    heatmap per cohort), not for the publication figures.
+    """
+    import matplotlib
+    from matplotlib.colors import Normalize
+    from PIL import Image, ImageDraw
+
+    px = job.dpi / 72
+    cell_font, tick_font = _font(8 * px, bold=True), _font(9 * px)
+    axis_font, title_font = _font(12 * px, bold=True), _font(14 * px, bold=True)
+    matrix = job.matrix
+    n_rows, n_cols = matrix.shape
+    labels, colors = _cell_labels(job)
+
+    cell_w = max(cell_font.getlength(label) for label in labels.ravel()) + 4 * px
+    cell_w = cell_h = round(max(cell_w, 3 * cell_font.size))
+    ylabel_masks = [_text_image(str(label), tick_font) for label in job.ylabels]
+    xlabel_masks = [_text_image(str(label), tick_font, angle=45) for label in job.xlabels]
+    pad = round(6 * px)
+
+    # Margins: axis label + tick labels on the left, rotated tick labels below,
+    # colorbar on the right, title on top
+    axis_h = axis_font.size + pad
+    left = axis_h + max(mask.width for mask in ylabel_masks) + 2 * pad
+    top = title_font.size + 3 * pad
+    bottom = max(mask.height for mask in xlabel_masks) + axis_h + 2 * pad
+    grid_w, grid_h = n_cols * cell_w, n_rows * cell_h
+    bar_w = round(cell_w / 3)
+    bar_ticks = np.linspace(job.vmin, job.vmax, 5)
+    bar_labels = [f'{tick:g}' for tick in bar_ticks]
+    right = 3 * pad + bar_w + max(round(tick_font.getlength(label)) for label in bar_labels) + axis_h + pad
+    image = Image.new('RGB', (left + grid_w + right, top + grid_h + bottom), 'white')
+    draw = ImageDraw.Draw(image)
+
+    # Cells: one colormap lookup, then each cell repeated into a block of pixels
+    cmap = matplotlib.colormaps[job.cmap]
+    norm = Normalize(job.vmin, job.vmax)
+    rgb = cmap(norm(matrix), bytes=True)[..., :3]
+    image.paste(Image.fromarray(np.repeat(np.repeat(rgb, cell_h, axis=0), cell_w, axis=1)), (left, top))
+    for (i, j), label in np.ndenumerate(labels):
+        draw.text((left + (j + 0.5) * cell_w, top + (i + 0.5) * cell_h), label,
+                  fill=colors[i, j], font=cell_font, anchor='mm')
+
+    # Tick labels: rows right-aligned beside the grid, columns rotated 45 degrees
+    # and ending under their cell, like `draw_heatmap`'s ha='right' labels
+    for i, mask in enumerate(ylabel_masks):
+        y = top + round((i + 0.5) * cell_h - mask.height / 2)
+        image.paste('black', (left - pad - mask.width, y), mask)
+    for j, mask in enumerate(xlabel_masks):
+        x = left + round((j + 0.5) * cell_w) - mask.width
+        image.paste('black', (x, top + grid_h + pad), mask)
+
+    # Colorbar
+    bar_x = left + grid_w + 2 * pad
+    gradient = cmap(np.linspace(1, 0, grid_h), bytes=True)[:, None, :3]
+    image.paste(Image.fromarray(np.repeat(gradient, bar_w, axis=1)), (bar_x, top))
+    for tick, label in zip(bar_ticks, bar_labels):
+        y = top + round((1 - norm(tick)) * (grid_h - 1))
+        draw.line([(bar_x + bar_w, y), (bar_x + bar_w + pad // 2, y)], fill='black', width=max(1, round(px)))
+        draw.text((bar_x + bar_w + pad, y), label, fill='black', font=tick_font, anchor='lm')
+    colorbar_mask = _text_image(job.colorbar_label, axis_font, angle=270)
+    image.paste('black', (image.width - pad - colorbar_mask.width, top + (grid_h - colorbar_mask.height) // 2),
+                colorbar_mask)
+
+    # Title and axis labels
+    draw.text((left + grid_w / 2, pad), job.title, fill='black', font=title_font, anchor='ma')
+    draw.text((left + grid_w / 2, image.height - pad), job.xlabel, fill='black', font=axis_font, anchor='md')
+    ylabel_mask = _text_image(job.ylabel, axis_font, angle=90)
+    image.paste('black', (pad, top + (grid_h - ylabel_mask.height) // 2), ylabel_mask)
+    return image
+
+
+def render_heatmap(job):
+    """Draw `job`, save it to `job.output_file` and free the figure"""
+    name = '/'.join(Path(job.output_file).parts[-2:])
+    if job.renderer == 'pillow':
+        with span(name, 'render', rows=job.matrix.shape[0]):
+            image = draw_heatmap_image(job)
+        with span(name, 'write'):
+            # Light zlib compression: encoding dominates at 300 dpi, files get ~1.5x larger
+            image.save(job.output_file, dpi=(job.dpi, job.dpi), compress_level=1)
+        return job.output_file
+
+    import matplotlib.pyplot as plt
+
+    with span(name, 'render', rows=job.matrix.shape[0]):
+        fig = draw_heatmap(job)
+    with span(name, 'write'):
+        fig.savefig(job.output_file, dpi=job.dpi, bbox_inches='tight')
+    plt.close(fig)
+    return job.output_file
+
+
+def _use_agg(trace_memory=None):
+    import matplotlib
+    matplotlib.use('Agg')
+    if trace_memory is not None:
+        tracing.enable_in_worker(trace_memory)
+
+
+def _render_traced(job):
+    """Render in a worker and hand its spans back to the tracing process"""
+    output_file = render_heatmap(job)
+    return output_file, tracing.active().drain()
+
+
+def render_jobs(jobs, processes=None, show=False):
+    """Render a batch of figure jobs.
+
+    With `show=True` the jobs are rendered in this process and displayed
+    interactively (standalone script runs). Otherwise they are rendered headless
+    on up to `processes` worker processes (default: one per CPU).
+    """
+    jobs = list(jobs)
+    if show:
+        import matplotlib.pyplot as plt
+        for job in jobs:
+            draw_heatmap(job).savefig(job.output_file, dpi=job.dpi, bbox_inches='tight')
+        plt.show()
+        return [job.output_file for job in jobs]
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(jobs) <= 1:
+        return [render_heatmap(job) for job in jobs]
+
+    tracer = tracing.active()
+    if tracer is None:
+        with ProcessPoolExecutor(max_workers=min(processes, len(jobs)), initializer=_use_agg) as pool:
+            return list(pool.map(render_heatmap, jobs))
+
+    with ProcessPoolExecutor(max_workers=min(processes, len(jobs)), initializer=_use_agg,
+                             initargs=(tracer.memory,)) as pool:
+        results = list(pool.map(_render_traced, jobs))
+    for _, spans in results:
+        tracer.spans.extend(spans)
+    return [output_file for output_file, _ in results]
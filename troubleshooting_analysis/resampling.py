@@ -0,0 +1,190 @@
+"""Uncertainty for conditional co-occurrence matrices.
+
+Two resampling procedures, run for every cell of the matrix at once:
+- Student-level cluster bootstrap: students are resampled with replacement and
+  each replicate keeps all the rows of the students drawn. The pair counts and
+  row totals are first summed per student, so a batch of replicates is just a
+  (replicates x students) multinomial weight matrix times the per-student
+  counts.
+- Label permutation test: the column-behavior flags are shuffled across rows
+  (optionally only within each student), which keeps every behavior's
+  frequency but breaks the link between row and column behaviors. A batch of
+  permuted pair counts is one batched matrix product.
+
+Replicates are drawn in chunks with independent seeds spawned from `seed`, and
+the chunks are spread over a process pool, so results only depend on `seed`
+and `chunk_size`, not on the number of processes. Within a chunk the
+permutations are evaluated a few at a time so that no temporary array holds
+more than `MAX_BATCH_ELEMENTS` values, whatever the number of rows.
+"""
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .cooccurrence import behavior_matrix, normalize_rows
+from .tracing import traced
+
+# Largest (permutations x rows x behaviors) temporary built at once (128 MiB of float64)
+MAX_BATCH_ELEMENTS = 1 << 24
+
+
+def _student_codes(data):
+    """Integer student codes for the rows of `data` (a student_id column or index)"""
+    student_ids = data['student_id'] if 'student_id' in data else data.index.to_series()
+    codes, _ = pd.factorize(student_ids)
+    return codes
+
+
+def _per_student_counts(x, y, codes, n_students):
+    """(students x K*L) pair counts and (students x K) row totals"""
+    pairs = np.zeros((n_students, x.shape[1], y.shape[1]))
+    totals = np.zeros((n_students, x.shape[1]))
+    np.add.at(totals, codes, x)
+    # One row behavior at a time, over only the rows that have it
+    for k in range(x.shape[1]):
+        rows = np.flatnonzero(x[:, k])
+        np.add.at(pairs[:, k], codes[rows], x[rows, k, None] * y[rows])
+    return pairs.reshape(n_students, -1), totals
+
+
+def _bootstrap_chunk(task):
+    student_pairs, student_totals, n_replicates, seed = task
+    rng = np.random.default_rng(seed)
+    n_students = len(student_totals)
+    weights = rng.multinomial(n_students, np.full(n_students, 1 / n_students), size=n_replicates).astype(float)
+    pairs = (weights @ student_pairs).reshape(n_replicates, student_totals.shape[1], -1)
+    totals = weights @ student_totals
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # NaN where a replicate has no rows with the row behavior
+        return pairs / totals[:, :, None] * 100
+
+
+def _permutation_chunk(task):
+    x, y, strata, observed_gap, expected, n_replicates, seed = task
+    rng = np.random.default_rng(seed)
+    n_rows = len(y)
+    grouped = np.argsort(strata, kind='stable')
+    # Permutations per batch; drawing the keys batch by batch gives the same
+    # stream of random numbers as drawing them all at once
+    batch = max(1, MAX_BATCH_ELEMENTS // max(n_rows * max(y.shape[1], 1), 1))
+    exceed = np.zeros(observed_gap.shape, dtype=np.int64)
+    for size in _chunk_sizes(n_replicates, batch):
+        keys = rng.random((size, n_rows))
+        # Shuffle within each stratum: sort by (stratum, random key) and map the
+        # result back onto the rows of each stratum in their original order
+        order = np.lexsort((keys, np.broadcast_to(strata, keys.shape)), axis=-1)
+        permutation = np.empty_like(order)
+        permutation[:, grouped] = order
+
+        permuted_pairs = x.T[None] @ y[permutation]
+        exceed += (np.abs(permuted_pairs - expected) >= observed_gap - 1e-9).sum(axis=0)
+    return exceed
+
+
+def _run_chunks(func, tasks, processes):
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1:
+        return [func(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(processes, len(tasks))) as pool:
+        return list(pool.map(func, tasks))
+
+
+def _chunk_sizes(n_replicates, chunk_size):
+    sizes = [chunk_size] * (n_replicates // chunk_size)
+    if n_replicates % chunk_size:
+        sizes.append(n_replicates % chunk_size)
+    return sizes
+
+
+@dataclass
+class CooccurrenceIntervals:
+    """Point estimates with bootstrap CIs and permutation p-values, all (K x L)
+
+    `lower`/`upper` are NaN where the bootstrap never saw the row behavior;
+    `p_values` are NaN on the diagonal of a square (same behaviors) matrix.
+    """
+    estimate: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    p_values: np.ndarray
+    confidence: float
+    n_replicates: int
+
+    def significant(self, alpha=0.05):
+        """Boolean mask of the cells whose permutation p-value is below `alpha`"""
+        return np.nan_to_num(self.p_values, nan=1.0) < alpha
+
+    def to_frame(self, row_labels, col_labels):
+        """One row per cell: estimate, CI bounds and p-value"""
+        index = pd.MultiIndex.from_product([row_labels, col_labels], names=['row', 'column'])
+        return pd.DataFrame({
+            'estimate': self.estimate.ravel(),
+            'lower': self.lower.ravel(),
+            'upper': self.upper.ravel(),
+            'p_value': self.p_values.ravel(),
+        }, index=index)
+
+
+@traced()
+def cooccurrence_intervals(data, row_cols, col_cols=None, n_replicates=10_000, confidence=0.95,
+                           permute_within_student=False, seed=0, processes=None, chunk_size=1000):
+    """Bootstrap CIs and permutation p-values for `conditional_cooccurrence`.
+
+    `data` is step-level rows or a student-level usage table, as for
+    `conditional_cooccurrence`. The bootstrap resamples students; the
+    permutation test shuffles the column behaviors across rows, or only
+    between each student's own rows with `permute_within_student`. Without
+    any rows every cell is NaN. `processes` defaults to one per CPU.
+    """
+    if n_replicates < 1:
+        raise ValueError(f"n_replicates must be at least 1, got {n_replicates}")
+    square = col_cols is None or list(col_cols) == list(row_cols)
+    col_cols = row_cols if col_cols is None else col_cols
+    x = behavior_matrix(data, row_cols).astype(float)
+    y = behavior_matrix(data, col_cols).astype(float)
+    codes = _student_codes(data)
+    n_students = codes.max(initial=-1) + 1
+    if n_students == 0:
+        empty = np.full((len(row_cols), len(col_cols)), np.nan)
+        return CooccurrenceIntervals(empty, empty.copy(), empty.copy(), empty.copy(), confidence, n_replicates)
+
+    pair_counts = x.T @ y
+    estimate = normalize_rows(pair_counts, x.sum(axis=0))
+
+    sizes = _chunk_sizes(n_replicates, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(2 * len(sizes))
+
+    # Cluster bootstrap
+    student_pairs, student_totals = _per_student_counts(x, y, codes, n_students)
+    replicates = np.concatenate(_run_chunks(
+        _bootstrap_chunk,
+        [(student_pairs, student_totals, size, seeds[k]) for k, size in enumerate(sizes)],
+        processes))
+    tail = (1 - confidence) / 2 * 100
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN cells stay NaN
+        lower, upper = np.nanpercentile(replicates, [tail, 100 - tail], axis=0)
+
+    # Permutation test, two-sided on the distance from the expected pair count
+    strata = codes if permute_within_student else np.zeros(len(x), dtype=np.int64)
+    stratum_x = np.zeros((max(strata.max(initial=-1) + 1, 1), x.shape[1]))
+    stratum_y = np.zeros((len(stratum_x), y.shape[1]))
+    np.add.at(stratum_x, strata, x)
+    np.add.at(stratum_y, strata, y)
+    stratum_size = np.maximum(np.bincount(strata, minlength=len(stratum_x)), 1)
+    expected = (stratum_x / stratum_size[:, None]).T @ stratum_y
+    observed_gap = np.abs(pair_counts - expected)
+    exceed = np.sum(_run_chunks(
+        _permutation_chunk,
+        [(x, y, strata, observed_gap, expected, size, seeds[len(sizes) + k]) for k, size in enumerate(sizes)],
+        processes), axis=0)
+    p_values = (1 + exceed) / (1 + n_replicates)
+    if square:
+        np.fill_diagonal(p_values, np.nan)
+
+    return CooccurrenceIntervals(estimate, lower, upper, p_values, confidence, n_replicates)
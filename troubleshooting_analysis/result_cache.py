@@ -0,0 +1,158 @@
+"""Content-addressed cache of analysis results.
+
+An analysis is a deterministic function of the observation data and its own
+code, so its results are stored under a hash of (data fingerprint, analysis
+name, source of the analysis script and of this package, plus any other input
+files it declares, such as outcome labels). An entry holds the
+figure jobs the analysis returned (with their computed matrices) and the bytes
+of every file it wrote. A batch run that finds an entry skips both the
+computation and the rendering, rewriting any missing output files from the
+cache. Entries are evicted least-recently-used once the cache grows past
+`max_bytes`.
+"""
+
+import hashlib
+import inspect
+import os
+import pickle
+from pathlib import Path
+
+import pandas as pd
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+CACHE_DIR_NAME = '.result_cache'
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+
+def data_fingerprint(df):
+    """SHA-256 of a frame's column names, dtypes and values"""
+    digest = hashlib.sha256()
+    digest.update(repr([(col, str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _file_digest(path, digest):
+    with open(path, 'rb') as f:
+        digest.update(f.read())
+
+
+def code_fingerprint(func):
+    """SHA-256 of the file defining `func` plus every module of this package"""
+    digest = hashlib.sha256()
+    _file_digest(inspect.getsourcefile(func), digest)
+    for module in sorted(PACKAGE_DIR.glob('*.py')):
+        _file_digest(module, digest)
+    return digest.hexdigest()
+
+
+def inputs_fingerprint(paths):
+    """SHA-256 of extra input files (None or missing files hash as absent)"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(repr(str(path)).encode())
+        if path is not None and Path(path).is_file():
+            _file_digest(path, digest)
+    return digest.hexdigest()
+
+
+def cache_key(*parts):
+    """Hash the repr of `parts` into an entry key"""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+class ResultCache:
+    """Pickled results in a directory, one file per key, evicted least-recently-used"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return default
+        # Mark as recently used
+        os.utime(path)
+        return value
+
+    def put(self, key, value):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix('.pkl.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+        self.evict()
+
+    def get_or_compute(self, key, compute):
+        """Cached value of `key`, calling `compute()` and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def entries(self):
+        """(path, size, last used) of every entry, least recently used first"""
+        entries = []
+        for path in self.cache_dir.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime_ns))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in `max_bytes`"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            path.unlink(missing_ok=True)
+
+
+def snapshot_files(directory):
+    """{path: (size, mtime_ns)} of the files in `directory` and its subdirectories"""
+    directory = Path(directory)
+    if not directory.exists():
+        return {}
+    return {path: (stat.st_size, stat.st_mtime_ns)
+            for path in directory.rglob('*') if path.is_file()
+            for stat in [path.stat()]}
+
+
+def written_files(before, directory):
+    """Files in `directory` created or modified since the `before` snapshot"""
+    after = snapshot_files(directory)
+    return [path for path, state in after.items() if before.get(path) != state]
+
+
+def read_outputs(paths, output_path):
+    """{file name relative to output_path: bytes} of the given output files"""
+    return {str(Path(path).relative_to(output_path)): Path(path).read_bytes() for path in paths}
+
+
+def restore_outputs(outputs, output_path):
+    """Write cached output files that are missing or differ under `output_path`"""
+    for name, contents in outputs.items():
+        path = Path(output_path) / name
+        if not path.exists() or path.stat().st_size != len(contents) or path.read_bytes() != contents:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(contents)
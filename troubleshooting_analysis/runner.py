@@ -0,0 +1,205 @@
+"""Run every registered analysis from a single load of the observation data.
+
+The runner loads the data once into an `AnalysisContext` and hands the same
+context to every analysis, so the derived frames (student rows, NEW-sheet
+subset, student-level usage table, master scan behaviors) are computed at most
+once per batch instead of once per script. With `workers > 1` the analyses
+themselves run in parallel on a process pool; each worker builds its own
+context from the same data, and the CPUs are split between the workers for
+the analyses' own process pools. Heatmaps returned by the analyses are rendered
+afterwards on a process pool (see `render.py`). With a `ResultCache`, analyses
+whose data and code are unchanged since a previous run are neither recomputed
+nor re-rendered (see `result_cache.py`).
+
+The command line lives in `cli.py`; `python -m troubleshooting_analysis.runner`
+is the same as `python -m troubleshooting_analysis run`.
+"""
+
+import dataclasses
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+
+from . import tracing
+from .context import AnalysisContext
+from .registry import ANALYSES, discover_analyses
+from .render import render_jobs
+from .result_cache import (cache_key, code_fingerprint, inputs_fingerprint, read_outputs, restore_outputs,
+                           snapshot_files, written_files)
+from .tracing import profile_path, profiled, span
+
+_worker_ctx = None
+
+
+def _init_worker(df, settings, processes, trace_memory=None):
+    global _worker_ctx
+    matplotlib.use('Agg')
+    if trace_memory is not None:
+        tracing.enable_in_worker(trace_memory)
+    discover_analyses()
+    _worker_ctx = AnalysisContext(df, settings, processes)
+
+
+def _run_in_worker(name, output_path, profile_file=None):
+    """Run one analysis in a worker process, writing into `output_path`.
+    Returns its figure jobs, run time and any spans it recorded"""
+    func, _ = ANALYSES[name]
+    start = time.perf_counter()
+    with span(name, 'analysis'), profiled(profile_file), matplotlib.rc_context():
+        jobs = list(func(_worker_ctx, Path(output_path)) or [])
+    seconds = time.perf_counter() - start
+    tracer = tracing.active()
+    return jobs, seconds, tracer.drain() if tracer is not None else []
+
+
+def _check_job_paths(name, jobs, directory):
+    """Raise ValueError if a figure job of analysis `name` writes outside `directory`"""
+    directory = Path(directory).resolve()
+    for job in jobs:
+        if not Path(job.output_file).resolve().is_relative_to(directory):
+            raise ValueError(f"{name}: figure job writes {job.output_file}, outside its output directory "
+                             f"{directory}")
+
+
+def _move_outputs(scratch_dir, output_path, jobs):
+    """Move the files an analysis wrote to `scratch_dir` (subdirectories
+    included) into `output_path` and point its figure jobs there too"""
+    moved = []
+    for path in sorted(Path(scratch_dir).rglob('*')):
+        if path.is_file():
+            target = output_path / path.relative_to(scratch_dir)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            moved.append(Path(shutil.move(str(path), target)))
+    scratch_dir = Path(scratch_dir).resolve()
+    jobs = [dataclasses.replace(job, output_file=output_path / Path(job.output_file).resolve().relative_to(scratch_dir))
+            for job in jobs]
+    for job in jobs:
+        # Figures are rendered later, so their (possibly still empty) directories aren't moved
+        Path(job.output_file).parent.mkdir(parents=True, exist_ok=True)
+    return moved, jobs
+
+
+def run_analyses(ctx, output_root, names=None, processes=None, cache=None, workers=1, record=None,
+                 profile_dir=None, figure_renderer=None):
+    """Run the named analyses (default: all registered) against one context.
+
+    Figure jobs returned by the analyses are rendered together at the end on up
+    to `processes` worker processes. Analyses found in `cache` are skipped and
+    their output files restored from it. With `workers > 1` the analyses not
+    found in the cache run in parallel, each writing to a scratch directory
+    whose files are moved into place afterwards. Returns {name: seconds} for
+    each analysis, plus 'render' for the figure rendering. If `record` is a
+    dict it is filled with {name: {'status': 'computed' or 'cached',
+    'outputs': [files]}}. With `profile_dir`, each computed analysis is run
+    under cProfile and its stats written to `<profile_dir>/<name>.prof`.
+    When tracing is enabled (see `tracing.py`) spans recorded in the worker
+    processes are collected into this process's tracer. `figure_renderer`
+    overrides the renderer of every figure job (e.g. 'pillow' for the fast
+    raster-only heatmaps, see `render.py`).
+    """
+    names = list(ANALYSES) if names is None else list(names)
+    unknown = [name for name in names if name not in ANALYSES]
+    if unknown:
+        raise KeyError(f"Unknown analyses: {', '.join(unknown)}")
+    record = {} if record is None else record
+
+    timings = {}
+    figure_jobs = []
+    # name -> (cache key, output path, files written by the analysis, figure jobs)
+    to_cache = {}
+    to_run = []
+    for name in names:
+        func, output_dir = ANALYSES[name]
+        output_path = Path(output_root) / output_dir
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        key = None
+        if cache is not None:
+            start = time.perf_counter()
+            key = cache_key(ctx.fingerprint, name, code_fingerprint(func))
+            if getattr(func, 'inputs', ()) or getattr(func, 'settings', ()):
+                key = cache_key(key, inputs_fingerprint([ctx.settings.get(setting) for setting in func.inputs]),
+                                [(setting, ctx.settings.get(setting)) for setting in func.settings])
+            if figure_renderer is not None:
+                key = cache_key(key, figure_renderer)
+            entry = cache.get(key)
+            if entry is not None:
+                with span(name, 'write', cached=True):
+                    restore_outputs(entry['outputs'], output_path)
+                timings[name] = time.perf_counter() - start
+                record[name] = {'status': 'cached', 'outputs': [str(output_path / out) for out in entry['outputs']]}
+                print(f"\n=== {name} ===\nUnchanged, {len(entry['outputs'])} output files restored from cache")
+                continue
+        to_run.append((name, key, output_path))
+
+    def finish(name, key, output_path, jobs, written):
+        if figure_renderer is not None:
+            jobs = [dataclasses.replace(job, renderer=figure_renderer) for job in jobs]
+        figure_jobs.extend(jobs)
+        outputs = set(written) | {Path(job.output_file) for job in jobs}
+        record[name] = {'status': 'computed', 'outputs': sorted(str(path) for path in outputs)}
+        if cache is not None:
+            to_cache[name] = (key, output_path, sorted(outputs), jobs)
+
+    tracer = tracing.active()
+    if workers > 1 and len(to_run) > 1:
+        trace_memory = tracer.memory if tracer is not None else None
+        pool_size = min(workers, len(to_run))
+        # Each worker's analyses get an equal share of the CPUs for their own pools
+        worker_processes = max(1, (os.cpu_count() or 1) // pool_size)
+        with tempfile.TemporaryDirectory(dir=output_root, prefix='.scratch-') as scratch_root, \
+                ProcessPoolExecutor(max_workers=pool_size, initializer=_init_worker,
+                                    initargs=(ctx.df, ctx.settings, worker_processes, trace_memory)) as pool:
+            futures = []
+            for i, (name, key, output_path) in enumerate(to_run):
+                scratch_dir = Path(scratch_root) / str(i)
+                scratch_dir.mkdir()
+                print(f"Queued {name}")
+                future = pool.submit(_run_in_worker, name, scratch_dir, profile_path(profile_dir, name))
+                futures.append((name, key, output_path, scratch_dir, future))
+            for name, key, output_path, scratch_dir, future in futures:
+                jobs, seconds, spans = future.result()
+                timings[name] = seconds
+                if tracer is not None:
+                    tracer.spans.extend(spans)
+                _check_job_paths(name, jobs, scratch_dir)
+                written, jobs = _move_outputs(scratch_dir, output_path, jobs)
+                finish(name, key, output_path, jobs, written)
+    else:
+        for name, key, output_path in to_run:
+            func, _ = ANALYSES[name]
+            print(f"\n=== {name} ===")
+            before = snapshot_files(output_path)
+            start = time.perf_counter()
+            # Keep one analysis's plot style from leaking into the next
+            with span(name, 'analysis'), profiled(profile_path(profile_dir, name)), matplotlib.rc_context():
+                jobs = list(func(ctx, output_path) or [])
+            timings[name] = time.perf_counter() - start
+            _check_job_paths(name, jobs, output_path)
+            finish(name, key, output_path, jobs, written_files(before, output_path))
+
+    if figure_jobs:
+        print(f"\nRendering {len(figure_jobs)} figures...")
+        start = time.perf_counter()
+        render_jobs(figure_jobs, processes=processes)
+        timings['render'] = time.perf_counter() - start
+
+    for name, (key, output_path, outputs, jobs) in to_cache.items():
+        with span(name, 'write', cache_put=True):
+            cache.put(key, {'jobs': jobs, 'outputs': read_outputs(outputs, output_path)})
+    return timings
+
+
+def main(argv=None):
+    from .cli import main as cli_main
+    cli_main(['run', *(sys.argv[1:] if argv is None else argv)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Frequent step patterns in the students' troubleshooting sessions.
+
+A pattern is a sequence of behaviors, one per step, e.g.
+('Reading schematic', 'Makes a hypothesis', 'Modify circuit using hypothesis').
+It occurs in a session when the behaviors appear in that order in consecutive
+steps (contiguous n-grams) or in increasing, not necessarily adjacent, steps
+(sequential patterns). Its support is the number of students whose session
+contains it.
+
+Mining is PrefixSpan-style: a pattern is only extended if it meets the minimum
+support (an extension can never be supported by more students than the pattern
+itself), and each extension only looks at the rows that can follow the
+pattern's occurrences (its projected rows) rather than rescanning the data.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from .bitset import BehaviorBitset
+from .transitions import sort_by_step, step_links
+
+
+def _student_ranges(codes):
+    """First row and one-past-last row of each student's block of sorted rows"""
+    n_students = int(codes.max()) + 1 if len(codes) else 0
+    first = np.searchsorted(codes, np.arange(n_students), side='left')
+    stop = np.searchsorted(codes, np.arange(n_students), side='right')
+    return first, stop
+
+
+def _concat_ranges(starts, stops):
+    """All rows in the half-open ranges [start, stop), concatenated"""
+    lengths = np.maximum(stops - starts, 0)
+    if lengths.sum() == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+    return np.arange(lengths.sum()) + offsets
+
+
+def mine_sequences(data, cols, min_support=2, max_length=3, contiguous=True, precedes=None):
+    """Frequent step patterns over the behaviors in `cols`.
+
+    - min_support: minimum number of students with the pattern, or a fraction
+      of the students when below 1
+    - max_length: longest pattern (number of steps) to mine
+    - contiguous: patterns must occupy consecutive steps; otherwise later
+      behaviors may occur any number of steps later
+    - precedes: only count occurrences whose last step is immediately followed
+      by a step with this behavior (e.g. what precedes 'Modify circuit using
+      hypothesis')
+
+    Step numbers are assumed unique within a student. Returns a DataFrame with
+    the pattern (tuple of behaviors), its length, support (students) and
+    occurrences (number of places a pattern occurrence ends, or starts with
+    `precedes`), most supported first.
+    """
+    cols = list(cols)
+    bit_cols = cols + ([precedes] if precedes is not None and precedes not in cols else [])
+    bits = sort_by_step(BehaviorBitset.from_frame(data, bit_cols))
+    flags = bits.to_matrix(cols).astype(bool)
+    codes = bits.student_codes
+
+    if 0 < min_support < 1:
+        min_support = math.ceil(min_support * len(np.unique(codes)))
+    first_row, stop_row = _student_ranges(codes)
+
+    # Without an anchor, patterns grow forward from their last step; anchored
+    # patterns grow backward from the step before the anchor behavior
+    forward = precedes is None
+    if forward:
+        link = step_links(bits, 1)
+        candidates = np.arange(len(bits))
+    else:
+        link = step_links(bits, -1)
+        following = step_links(bits, 1)
+        anchored = following >= 0
+        anchored[anchored] = bits.has(precedes)[following[anchored]]
+        candidates = np.flatnonzero(anchored)
+
+    def next_candidates(rows):
+        """Rows that can hold the next behavior of a pattern occurring at `rows`"""
+        if contiguous:
+            linked = link[rows]
+            return linked[linked >= 0]
+        # Every later (earlier, growing backward) row of each student that has an occurrence
+        student_codes, at = np.unique(codes[rows], return_index=True)
+        if forward:
+            return _concat_ranges(rows[at] + 1, stop_row[student_codes])
+        last = np.r_[at[1:], len(rows)] - 1
+        return _concat_ranges(first_row[student_codes], rows[last])
+
+    results = []
+
+    def grow(pattern, rows):
+        if len(rows) == 0:
+            return
+        rows = np.sort(rows)
+        present = flags[rows]
+        starts = np.flatnonzero(np.r_[True, codes[rows][1:] != codes[rows][:-1]])
+        support = np.logical_or.reduceat(present, starts, axis=0).sum(axis=0)
+        occurrences = present.sum(axis=0)
+        for item in np.flatnonzero(support >= min_support):
+            extended = pattern + (cols[item],) if forward else (cols[item],) + pattern
+            results.append((extended, len(extended), int(support[item]), int(occurrences[item])))
+            if len(extended) < max_length:
+                grow(extended, next_candidates(rows[present[:, item]]))
+
+    grow((), candidates)
+
+    patterns = pd.DataFrame(results, columns=['pattern', 'length', 'support', 'occurrences'])
+    return patterns.sort_values(['support', 'length', 'occurrences'], ascending=[False, True, False],
+                                kind='stable').reset_index(drop=True)
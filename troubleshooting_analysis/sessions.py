@@ -0,0 +1,126 @@
+"""Session boundaries over the (student, step)-sorted step bitmasks.
+
+`SessionIndex` sorts the steps once by student and step and keeps each
+session's start and end offset into the sorted arrays. The first and last step
+of every session, session lengths and the relative position of each step
+within its session are then gathers over those offsets, one array operation
+for all sessions (or for any cohort of students) instead of a per-student
+filter.
+
+    sessions = ctx.sessions
+    sessions.opening_distribution(ACTION_COLS)              # % of sessions starting with each action
+    sessions.closing_distribution(ACTION_COLS, students=successful)
+"""
+
+import numpy as np
+import pandas as pd
+
+from .bitset import BehaviorBitset
+from .columns import BEHAVIOR_COLS
+from .transitions import sort_by_step
+
+
+class SessionIndex:
+    """Start/end row offsets of every session in a step-sorted `BehaviorBitset`
+
+    `students` holds the session IDs in index order; session i covers rows
+    `starts[i]:ends[i]` of `bits`.
+    """
+
+    def __init__(self, bits):
+        self.bits = sort_by_step(bits)
+        codes = self.bits.student_codes
+        if len(codes):
+            self.starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        else:
+            self.starts = np.zeros(0, dtype=np.int64)
+        self.ends = np.r_[self.starts[1:], len(codes)].astype(np.int64)
+        self.students = self.bits.students[codes[self.starts]]
+        self._positions = pd.Index(self.students)
+
+    @classmethod
+    def from_frame(cls, data, columns=BEHAVIOR_COLS):
+        return cls(BehaviorBitset.from_frame(data, columns))
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def lengths(self):
+        """Steps per session"""
+        return self.ends - self.starts
+
+    def sessions(self, students=None):
+        """Positions of the sessions of `students` (default: all); students
+        without observed steps are left out"""
+        if students is None:
+            return np.arange(len(self))
+        positions = self._positions.get_indexer(pd.Index(students).unique())
+        return positions[positions >= 0]
+
+    def session_of_row(self):
+        """Session position of every row of `bits`"""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def relative_position(self):
+        """Position of every row within its session, from 0 (first step) to 1
+        (last step); single-step sessions are at 0"""
+        session = self.session_of_row()
+        offset = np.arange(len(self.bits)) - self.starts[session]
+        return offset / np.maximum(self.lengths[session] - 1, 1)
+
+    def rows_at(self, fraction, students=None):
+        """Row of the step at `fraction` (0 = first, 1 = last) of each session,
+        rounding to the nearest step"""
+        sessions = self.sessions(students)
+        return self.starts[sessions] + np.rint(fraction * (self.lengths[sessions] - 1)).astype(np.int64)
+
+    def first_rows(self, students=None):
+        return self.starts[self.sessions(students)]
+
+    def last_rows(self, students=None):
+        return self.ends[self.sessions(students)] - 1
+
+    def _flags(self, rows, cols, sessions):
+        cols = self.bits.columns if cols is None else list(cols)
+        flags = self.bits.subset(rows).to_matrix(cols).astype(bool)
+        return pd.DataFrame(flags, index=pd.Index(self.students[sessions], name='student_id'), columns=cols)
+
+    def first(self, cols=None, students=None):
+        """Session x behavior table of the behaviors in each session's first step"""
+        return self._flags(self.first_rows(students), cols, self.sessions(students))
+
+    def last(self, cols=None, students=None):
+        """Session x behavior table of the behaviors in each session's last step"""
+        return self._flags(self.last_rows(students), cols, self.sessions(students))
+
+    def at(self, fraction, cols=None, students=None):
+        """Session x behavior table of the behaviors at `fraction` of each session"""
+        return self._flags(self.rows_at(fraction, students), cols, self.sessions(students))
+
+    def opening_distribution(self, cols=None, students=None):
+        """% of sessions whose first step has each behavior (a step can have
+        several, so the shares need not add up to 100)"""
+        return self.first(cols, students).mean() * 100
+
+    def closing_distribution(self, cols=None, students=None):
+        """% of sessions whose last step has each behavior"""
+        return self.last(cols, students).mean() * 100
+
+    def position_profile(self, bins=5, cols=None, students=None):
+        """% of steps with each behavior in each of `bins` equal slices of the
+        sessions' relative position (bins x behaviors)"""
+        cols = self.bits.columns if cols is None else list(cols)
+        in_cohort = np.zeros(len(self), dtype=bool)
+        in_cohort[self.sessions(students)] = True
+        rows = np.flatnonzero(in_cohort[self.session_of_row()])
+        position = self.relative_position()[rows]
+        slot = np.minimum((position * bins).astype(np.int64), bins - 1)
+        flags = self.bits.subset(rows).to_matrix(cols).astype(np.int64)
+        totals = np.zeros((bins, len(cols)), dtype=np.int64)
+        np.add.at(totals, slot, flags)
+        steps = np.bincount(slot, minlength=bins)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shares = totals / steps[:, None] * 100
+        labels = [f'{i / bins:.0%}-{(i + 1) / bins:.0%}' for i in range(bins)]
+        return pd.DataFrame(shares, index=pd.Index(labels, name='position'), columns=cols)
@@ -0,0 +1,142 @@
+"""Single typed load path for processed_observation_data.csv.
+
+The CSV is parsed once and converted into a Parquet file with categorical
+`student_id`, uint8 behavior flags and int16 `step`. Later loads read the
+Parquet file directly. The cache records the size, mtime and SHA-256 of the
+CSV it was built from and is rebuilt whenever the CSV changes.
+"""
+
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+from .columns import BEHAVIOR_COLS, MASTER_SCAN_ID
+from .tracing import traced
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # the Parquet cache is skipped without pyarrow
+    pa = None
+    pq = None
+
+CACHE_DIR_NAME = '.observation_cache'
+
+
+@traced('load', rows='output')
+def read_observation_csv(csv_path):
+    """Parse the processed observation CSV straight into compact dtypes
+    (blank behavior flags count as 0, i.e. not observed)"""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    flag_cols = [col for col in BEHAVIOR_COLS if col in header]
+    dtypes = {col: 'UInt8' for col in flag_cols}
+    if 'student_id' in header:
+        dtypes['student_id'] = 'category'
+    if 'step' in header:
+        dtypes['step'] = 'int16'
+    df = pd.read_csv(csv_path, dtype=dtypes)
+    df[flag_cols] = df[flag_cols].fillna(0).astype('uint8')
+    return df
+
+
+def cache_path_for(csv_path, cache_dir=None):
+    """Where the Parquet copy of `csv_path` is kept"""
+    csv_path = Path(csv_path)
+    cache_dir = Path(cache_dir) if cache_dir is not None else csv_path.parent / CACHE_DIR_NAME
+    return cache_dir / f"{csv_path.stem}.parquet"
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_fingerprint(csv_path):
+    stat = Path(csv_path).stat()
+    return {
+        b'source_size': str(stat.st_size).encode(),
+        b'source_mtime_ns': str(stat.st_mtime_ns).encode(),
+        b'source_sha256': _file_sha256(csv_path).encode(),
+    }
+
+
+def _cache_status(csv_path, cache_path):
+    """'fresh', 'touched' (same contents, new mtime) or 'stale'"""
+    try:
+        cached = pq.read_schema(cache_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return 'stale'
+
+    # Cheap size/mtime check first, falling back to comparing content hashes
+    stat = Path(csv_path).stat()
+    if (cached.get(b'source_size') == str(stat.st_size).encode()
+            and cached.get(b'source_mtime_ns') == str(stat.st_mtime_ns).encode()):
+        return 'fresh'
+    if cached.get(b'source_sha256') == _file_sha256(csv_path).encode():
+        return 'touched'
+    return 'stale'
+
+
+def _write_cache(df, csv_path, cache_path):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata.update(_source_fingerprint(csv_path))
+    table = table.replace_schema_metadata(metadata)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix('.parquet.tmp')
+    pq.write_table(table, tmp_path)
+    tmp_path.replace(cache_path)
+
+
+@traced('load', rows='output')
+def load_observations(csv_path, cache_dir=None, use_cache=True):
+    """Load processed observation data through the Parquet cache.
+
+    Falls back to a typed CSV parse when pyarrow is not installed or the cache
+    directory is not writable.
+    """
+    csv_path = Path(csv_path)
+    if not use_cache or pq is None:
+        return read_observation_csv(csv_path)
+
+    cache_path = cache_path_for(csv_path, cache_dir)
+    status = _cache_status(csv_path, cache_path) if cache_path.exists() else 'stale'
+    if status != 'stale':
+        df = pq.read_table(cache_path).to_pandas()
+        if status == 'touched':
+            # Record the new mtime so the hash isn't recomputed on every load
+            try:
+                _write_cache(df, csv_path, cache_path)
+            except OSError:
+                pass
+        return df
+
+    df = read_observation_csv(csv_path)
+    try:
+        _write_cache(df, csv_path, cache_path)
+    except OSError as e:
+        print(f"Could not write observation cache {cache_path}: {e}")
+    return df
+
+
+def _drop_unused_ids(df):
+    if isinstance(df['student_id'].dtype, pd.CategoricalDtype):
+        df['student_id'] = df['student_id'].cat.remove_unused_categories()
+    return df
+
+
+@traced('filter')
+def student_rows(df):
+    """All student observations (everything except the master scan)"""
+    return _drop_unused_ids(df[df['student_id'] != MASTER_SCAN_ID].copy())
+
+
+@traced('filter')
+def master_rows(df):
+    """The expert master scan observations"""
+    return _drop_unused_ids(df[df['student_id'] == MASTER_SCAN_ID].copy())
@@ -0,0 +1,120 @@
+"""Synthetic observation data shaped like processed_observation_data.csv.
+
+Sessions get a random number of steps and each behavior is marked in a step
+independently with its prevalence. A fraction of the students use the OLD
+sheet (no strategy columns, so all strategies are 0). A master scan session
+(`MASTER_SCAN_ID`) is always included. The tables have the same columns and
+dtypes as `store.load_observations`, so they can stand in for the real data
+in benchmarks and standalone runs.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .columns import ACTION_COLS, BEHAVIOR_COLS, MASTER_SCAN_ID
+
+DEFAULT_PREVALENCE = 0.25
+
+
+def _session_rows(rng, n_students, steps_per_student, prevalence, new_sheet_fraction, first_student):
+    """(student index, step, flags) for `n_students` random sessions"""
+    low, high = steps_per_student
+    lengths = rng.integers(low, high + 1, size=n_students)
+    student_index = np.repeat(np.arange(first_student, first_student + n_students), lengths)
+    starts = np.cumsum(lengths) - lengths
+    steps = np.arange(lengths.sum()) - np.repeat(starts, lengths) + 1
+
+    flags = (rng.random((len(steps), len(BEHAVIOR_COLS))) < prevalence).astype(np.uint8)
+    old_sheet = rng.random(n_students) >= new_sheet_fraction
+    flags[np.repeat(old_sheet, lengths), len(ACTION_COLS):] = 0
+    return student_index, steps, flags
+
+
+def _frame(student_ids, steps, flags):
+    df = pd.DataFrame(flags, columns=BEHAVIOR_COLS)
+    df.insert(0, 'step', steps.astype(np.int16))
+    df.insert(0, 'student_id', student_ids)
+    return df
+
+
+def master_scan(n_steps=6, prevalence=DEFAULT_PREVALENCE, seed=0):
+    """A synthetic master scan session with every step marking at least one action"""
+    rng = np.random.default_rng(seed)
+    flags = (rng.random((n_steps, len(BEHAVIOR_COLS))) < prevalence).astype(np.uint8)
+    flags[np.arange(n_steps), rng.integers(0, len(ACTION_COLS), size=n_steps)] = 1
+    return _frame(np.full(n_steps, MASTER_SCAN_ID, dtype=object), np.arange(1, n_steps + 1), flags)
+
+
+def generate_observations(n_students=59, steps_per_student=(2, 8), prevalence=DEFAULT_PREVALENCE,
+                          new_sheet_fraction=0.2, master_steps=6, seed=0):
+    """Synthetic processed observations: `n_students` sessions plus a master scan.
+
+    `steps_per_student` is an inclusive (min, max) range; `prevalence` is one
+    probability for every behavior or one per behavior in `BEHAVIOR_COLS` order.
+    """
+    rng = np.random.default_rng(seed)
+    prevalence = np.broadcast_to(np.asarray(prevalence, dtype=float), (len(BEHAVIOR_COLS),))
+    student_index, steps, flags = _session_rows(rng, n_students, steps_per_student, prevalence,
+                                                new_sheet_fraction, 0)
+    ids = np.array([f'SYN_{i:07d}' for i in range(n_students)], dtype=object)
+    df = pd.concat([_frame(ids[student_index], steps, flags),
+                    master_scan(master_steps, prevalence, seed)], ignore_index=True)
+    df['student_id'] = df['student_id'].astype('category')
+    return df
+
+
+def rows_to_students(n_rows, steps_per_student=(2, 8)):
+    """Number of students that gives roughly `n_rows` step observations"""
+    return max(1, round(n_rows / (sum(steps_per_student) / 2)))
+
+
+def write_observations_csv(path, n_students=59, steps_per_student=(2, 8), prevalence=DEFAULT_PREVALENCE,
+                           new_sheet_fraction=0.2, master_steps=6, seed=0, students_per_chunk=200_000):
+    """Write synthetic observations to a CSV in chunks of students (bounded memory).
+
+    Returns the number of rows written, master scan included.
+    """
+    rng = np.random.default_rng(seed)
+    prevalence = np.broadcast_to(np.asarray(prevalence, dtype=float), (len(BEHAVIOR_COLS),))
+    written = 0
+    with open(path, 'w', newline='') as f:
+        master = master_scan(master_steps, prevalence, seed)
+        master.to_csv(f, index=False)
+        written += len(master)
+        for first in range(0, n_students, students_per_chunk):
+            count = min(students_per_chunk, n_students - first)
+            student_index, steps, flags = _session_rows(rng, count, steps_per_student, prevalence,
+                                                        new_sheet_fraction, first)
+            ids = np.char.add('SYN_', np.char.zfill(student_index.astype(str), 7))
+            _frame(ids, steps, flags).to_csv(f, header=False, index=False)
+            written += len(steps)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic processed observation data")
+    parser.add_argument('--out', required=True, type=Path, help="CSV to write")
+    parser.add_argument('--students', type=int, default=59, help="Number of student sessions")
+    parser.add_argument('--rows', type=int, default=None, help="Approximate row count (overrides --students)")
+    parser.add_argument('--min-steps', type=int, default=2, help="Fewest steps per session")
+    parser.add_argument('--max-steps', type=int, default=8, help="Most steps per session")
+    parser.add_argument('--prevalence', type=float, default=DEFAULT_PREVALENCE,
+                        help="Probability a behavior is marked in a step")
+    parser.add_argument('--new-sheet-fraction', type=float, default=0.2,
+                        help="Fraction of students on the NEW (actions and strategies) sheet")
+    parser.add_argument('--master-steps', type=int, default=6, help="Steps in the master scan")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    steps = (args.min_steps, args.max_steps)
+    n_students = rows_to_students(args.rows, steps) if args.rows else args.students
+    written = write_observations_csv(args.out, n_students, steps, args.prevalence, args.new_sheet_fraction,
+                                     args.master_steps, args.seed)
+    print(f"Wrote {written} step observations for {n_students} students to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
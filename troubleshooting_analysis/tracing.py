@@ -0,0 +1,259 @@
+"""Per-stage timing and memory spans for analysis runs.
+
+Stages are marked with `span()` blocks or the `@traced` decorator. Each span
+records a category (load, filter, compute, render, write, analysis), its wall
+and CPU time, the rows it processed and, with `memory=True`, the peak memory
+allocated while it was open (tracemalloc). The load/filter/compute helpers in
+this package, heatmap rendering and the runner are already instrumented.
+
+Tracing is off unless `enable()` has been called. A disabled span is a shared
+no-op object and a disabled `@traced` function is one global check plus the
+call, so the instrumentation can stay in the hot paths.
+
+    tracer = tracing.enable(memory=True)
+    ...run analyses...
+    tracer.write_chrome_trace('trace.json')   # chrome://tracing or ui.perfetto.dev
+    tracer.summary()
+
+`profiled(path)` runs a block under cProfile and dumps the stats to `path`
+(`python -m pstats path` or snakeviz to read them).
+"""
+
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+_tracer = None
+
+
+class _NullSpan:
+    """What `span()` returns while tracing is disabled"""
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'category', 'rows', 'args', '_start', '_cpu', '_memory', '_peak')
+
+    def __init__(self, tracer, name, category, rows, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.rows = rows
+        self.args = args
+
+    def __enter__(self):
+        if self.tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.tracer._fold_peak(peak)
+            tracemalloc.reset_peak()
+            self._memory = self._peak = current
+            self.tracer._stack.append(self)
+        self._cpu = time.process_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        cpu = time.process_time() - self._cpu
+        record = {
+            'name': self.name,
+            'category': self.category,
+            'start': self._start,
+            'wall_seconds': end - self._start,
+            'cpu_seconds': cpu,
+            'rows': self.rows,
+            'pid': os.getpid(),
+            'tid': threading.get_native_id(),
+        }
+        if self.tracer.memory:
+            self.tracer._stack.pop()
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            record['peak_bytes'] = self._peak - self._memory
+            if self.tracer._stack:
+                parent = self.tracer._stack[-1]
+                parent._peak = max(parent._peak, self._peak)
+        if self.args:
+            record['args'] = self.args
+        self.tracer.spans.append(record)
+        return False
+
+
+class Tracer:
+    """Collects the spans recorded while it is enabled"""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.spans = []
+        self._stack = []
+        self._started_tracemalloc = False
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _fold_peak(self, peak):
+        # The enclosing span's peak so far, before tracemalloc's is reset for a child
+        if self._stack:
+            self._stack[-1]._peak = max(self._stack[-1]._peak, peak)
+
+    def span(self, name, category='compute', rows=None, **args):
+        return _Span(self, name, category, rows, args)
+
+    def close(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def drain(self):
+        """Return and forget the spans recorded so far (worker processes)"""
+        spans, self.spans = self.spans, []
+        return spans
+
+    def summary(self):
+        """Totals per (category, name), slowest first"""
+        totals = defaultdict(lambda: {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows': 0})
+        for record in self.spans:
+            entry = totals[record['category'], record['name']]
+            entry['calls'] += 1
+            entry['wall_seconds'] += record['wall_seconds']
+            entry['cpu_seconds'] += record['cpu_seconds']
+            entry['rows'] += record['rows'] or 0
+            if 'peak_bytes' in record:
+                entry['peak_bytes'] = max(entry.get('peak_bytes', 0), record['peak_bytes'])
+        rows = [{'category': category, 'name': name, **entry} for (category, name), entry in totals.items()]
+        return sorted(rows, key=lambda entry: entry['wall_seconds'], reverse=True)
+
+    def to_chrome_trace(self):
+        """The spans as Chrome trace-event JSON ("X" complete events, in µs)"""
+        origin = min((record['start'] for record in self.spans), default=0.0)
+        events = []
+        for record in self.spans:
+            args = {'cpu_ms': round(record['cpu_seconds'] * 1e3, 3)}
+            if record['rows'] is not None:
+                args['rows'] = record['rows']
+            if 'peak_bytes' in record:
+                args['peak_kb'] = round(record['peak_bytes'] / 1024, 1)
+            args.update(record.get('args', {}))
+            events.append({
+                'name': record['name'], 'cat': record['category'], 'ph': 'X',
+                'ts': round((record['start'] - origin) * 1e6, 1),
+                'dur': round(record['wall_seconds'] * 1e6, 1),
+                'pid': record['pid'], 'tid': record['tid'], 'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path):
+        Path(path).write_text(json.dumps(self.to_chrome_trace()))
+        return path
+
+
+def enable(memory=False):
+    """Start recording spans in this process and return the tracer"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(memory)
+    return _tracer
+
+
+def enable_in_worker(memory=False):
+    """Start a fresh tracer in a pool worker, discarding any copied from the
+    parent process when the worker was forked"""
+    global _tracer
+    _tracer = Tracer(memory)
+    return _tracer
+
+
+def disable():
+    """Stop recording; returns the tracer that was active (or None)"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+
+def active():
+    return _tracer
+
+
+def span(name, category='compute', rows=None, **args):
+    """Context manager timing one stage; set `.rows` on it if the count is
+    only known inside the block"""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, category, rows, **args)
+
+
+def _row_count(value):
+    if hasattr(value, 'shape'):
+        return int(value.shape[0])
+    if hasattr(value, '__len__') and not isinstance(value, (str, bytes, Path)):
+        return len(value)
+    return None
+
+
+def traced(category='compute', name=None, rows='input'):
+    """Decorator recording every call of the function as a span.
+
+    `rows` is 'input' (length of the first argument), 'output' (length of
+    the result) or None.
+    """
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(label, category) as stage:
+                if rows == 'input' and args:
+                    stage.rows = _row_count(args[0])
+                result = func(*args, **kwargs)
+                if rows == 'output':
+                    stage.rows = _row_count(result)
+            return result
+        return wrapper
+    return decorate
+
+
+class profiled:
+    """Run a block under cProfile and dump the stats to `path` (no-op for None)"""
+
+    def __init__(self, path):
+        self.path = Path(path) if path is not None else None
+        self.profile = None
+
+    def __enter__(self):
+        if self.path is not None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.disable()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.profile.dump_stats(self.path)
+        return False
+
+
+def profile_path(profile_dir, analysis_name):
+    """Where the cProfile stats of one analysis go"""
+    if profile_dir is None:
+        return None
+    return Path(profile_dir) / (analysis_name.replace('/', '.') + '.prof')
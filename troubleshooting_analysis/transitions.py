@@ -0,0 +1,98 @@
+"""Step-to-step transitions within each student's session.
+
+The observations are sorted once by (student, step). Each row is then compared
+with the row after it: the pair is a transition when both rows belong to the
+same student and the second step number is exactly one more than the first.
+Transition counts are a single matrix product over the 0/1 flags of those row
+pairs, instead of a per-student loop over step pairs. `lag_transitions`
+generalizes this to step N -> step N+k for every k up to `max_lag`.
+"""
+
+import numpy as np
+
+from .bitset import BehaviorBitset
+from .tracing import traced
+
+
+def sort_by_step(bits):
+    """Reorder a `BehaviorBitset` by student, then step (stable for repeated steps)"""
+    return bits.subset(np.lexsort((bits.steps, bits.student_codes)))
+
+
+@traced()
+def next_step_transitions(data, cols):
+    """Count step N -> step N+1 transitions between the behaviors in `cols`.
+
+    Returns
+    - pair_counts: (K x K) count of consecutive step pairs with X in step N
+      and Y in step N+1
+    - continuing_counts: steps with X that are followed by step N+1
+    - last_counts: steps with X that are the final step of a student's session
+
+    Steps followed by a gap in the step numbering are neither continuing nor
+    final and are not counted.
+    """
+    bits = sort_by_step(BehaviorBitset.from_frame(data, cols))
+    flags = bits.to_matrix()
+    codes = bits.student_codes
+    steps = bits.steps.astype(np.int64)
+
+    same_student = codes[1:] == codes[:-1]
+    consecutive = same_student & (steps[1:] == steps[:-1] + 1)
+    is_last = np.r_[~same_student, True] if len(flags) else np.zeros(0, dtype=bool)
+
+    current = flags[:-1][consecutive]
+    following = flags[1:][consecutive]
+    pair_counts = current.T.astype(np.int64) @ following
+    continuing_counts = current.sum(axis=0, dtype=np.int64)
+    last_counts = flags[is_last].sum(axis=0, dtype=np.int64)
+    return pair_counts, continuing_counts, last_counts
+
+
+def step_links(bits, lag=1):
+    """For each row of a step-sorted bitset, the row holding the same student's
+    step + `lag` (-1 where that step was not observed). Negative lags link to
+    earlier steps.
+    """
+    if len(bits) == 0:
+        return np.zeros(0, dtype=np.int64)
+    steps = bits.steps.astype(np.int64)
+    offsets = steps - steps.min()
+    # One sorted key per row; the stride keeps the students' step ranges apart
+    stride = int(offsets.max()) + abs(lag) + 1
+    keys = bits.student_codes.astype(np.int64) * stride + offsets
+    targets = keys + lag
+    rows = np.searchsorted(keys, targets).clip(max=len(keys) - 1)
+    return np.where(keys[rows] == targets, rows, -1)
+
+
+@traced()
+def lag_transitions(data, row_cols, col_cols=None, max_lag=1):
+    """Count step N -> step N+k transitions for every lag k = 1..max_lag.
+
+    Row and column behaviors can be any mix of actions and strategies. Returns
+    - pair_counts: (max_lag x R x C) count of steps with row behavior X whose
+      step N+k (same student) has column behavior Y
+    - row_totals: (max_lag x R) count of steps with X that have a step N+k
+
+    `pair_counts[k - 1] / row_totals[k - 1]` (see `normalize_rows`) is the lag-k
+    transition matrix. With unique step numbers per student, lag 1 gives the
+    same counts as `next_step_transitions`.
+    """
+    if col_cols is None:
+        col_cols = row_cols
+    row_cols, col_cols = list(row_cols), list(col_cols)
+
+    bits = sort_by_step(BehaviorBitset.from_frame(data, list(dict.fromkeys(row_cols + col_cols))))
+    x = bits.to_matrix(row_cols)
+    y = bits.to_matrix(col_cols)
+
+    pair_counts = np.zeros((max_lag, len(row_cols), len(col_cols)), dtype=np.int64)
+    row_totals = np.zeros((max_lag, len(row_cols)), dtype=np.int64)
+    for lag in range(1, max_lag + 1):
+        later = step_links(bits, lag)
+        has_later = later >= 0
+        current = x[has_later]
+        pair_counts[lag - 1] = current.T.astype(np.int64) @ y[later[has_later]]
+        row_totals[lag - 1] = current.sum(axis=0, dtype=np.int64)
+    return pair_counts, row_totals